@@ -0,0 +1,217 @@
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError as error:  # The game itself doesn't need NumPy; see requirements-dev.txt
+    raise ImportError('batch_board needs NumPy: pip install -r requirements-dev.txt') from error
+
+from engine import LETTER_CHOICES, LETTER_CUM_WEIGHTS, TileState
+from hex_grid import neighbor_table
+
+
+"""
+Many boards at once, as NumPy arrays, for analytics that need far more boards than Board/TileState objects can
+handle. The arrays are shaped (rows, boards, columns): a board's cell (column, row) is at [row, board, column]. Rows
+come first because the rules mostly compare a tile with the one below it, and with this layout that's a comparison of
+two contiguous slices. Paths and letters_of() still number cells column * num_rows + row, as solver.solve() does.
+
+The rules follow engine.Board: submitted tiles (and tiles burned by fire) move to the top of their column with new
+letters while the tiles above them drop down, words can roll crystal or fire tiles, and fire tiles that are ready burn
+through the tile below them, ending the game if they burn through the bottom row. Marking and selecting tiles only
+matter to a player, so they aren't kept.
+"""
+
+
+FIRE, NORMAL, CRYSTAL = 0, 1, 2
+BYPASSED_FIRE = 3  # A fire tile that sits out the next set_fire_tiles_ready(), which turns it back into FIRE
+
+LETTER_LENGTHS = np.array([len(letter) for letter in LETTER_CHOICES])  # 'Qu' counts as 2 letters
+LETTER_PROBABILITIES = np.array(LETTER_CUM_WEIGHTS) / LETTER_CUM_WEIGHTS[-1]
+LETTER_VALUES = np.array([TileState(0, 0, letter).value for letter in LETTER_CHOICES])
+
+# The chance that a word of (index) letters creates a crystal or fire tile; see Board.roll_for_crystal_tile() and
+# Board.roll_for_fire_tile(). Words longer than the last entry use the last entry.
+CRYSTAL_CHANCE = np.array([0, 0, 0, 0, 0, 8 / 20, 14 / 20, 15 / 20, 1])
+FIRE_CHANCE = np.array([0, 0, 0, 17 / 20, 4 / 20, 1 / 20, 0])
+SCRAMBLE_FIRE_CHANCE = 8 / 10
+
+
+class BatchBoards:
+    """
+    {{ num_boards }} boards that advance together: submit() plays one word on each board (or nothing), scramble()
+    scrambles any of them, and burn() lets every board's ready fire tiles burn down. Boards that are game over stop
+    burning and ignore submitted paths; {{ self.game_over }} says which ones they are.
+    """
+
+    def __init__(self, num_boards: int, num_columns: int = 7, num_rows: int = 7, seed: Optional[int] = None):
+        self.num_boards = num_boards
+        self.num_columns = num_columns
+        self.num_rows = num_rows
+        self.rng = np.random.default_rng(seed)
+
+        shape = (num_rows, num_boards, num_columns)
+        self.letters = self.draw_letters(num_rows * num_boards * num_columns).reshape(shape)  # LETTER_CHOICES indexes
+        self.types = np.full(shape, NORMAL, dtype=np.uint8)
+        self.burn_ready = np.zeros(shape, dtype=bool)
+        self.game_over = np.zeros(num_boards, dtype=bool)
+
+        # Each cell's neighbors as cell numbers, padded with -1 up to 6
+        self.adjacency = np.full((num_columns * num_rows, 6), -1, dtype=np.int16)
+        for column, rows in enumerate(neighbor_table(num_columns, num_rows)):
+            for row, slots in enumerate(rows):
+                self.adjacency[column * num_rows + row, :len(slots)] = [c * num_rows + r for c, r in slots]
+
+        # A cell number's offset into the flattened arrays, less the board's, and a column of row numbers
+        cells = np.arange(num_columns * num_rows)
+        self.cell_offsets = cells % num_rows * num_boards * num_columns + cells // num_rows
+        self.rows = np.arange(num_rows).reshape(num_rows, 1)
+
+    @property
+    def neighbors(self) -> list[list[int]]:
+        """ {{ self.adjacency }} without the padding, as solver.solve() takes it. """
+        return [[cell for cell in cells if cell >= 0] for cells in self.adjacency.tolist()]
+
+    def burn(self) -> np.ndarray:
+        """
+        Lets every ready fire tile burn through the tile below it. Returns which boards went game over on this burn,
+        i.e. had a ready fire tile on the bottom row.
+        """
+        ready = self.burn_ready & (self.types == FIRE) & ~self.game_over[:, None]
+        if not ready.any():
+            return np.zeros(self.num_boards, dtype=bool)
+
+        self.burn_ready &= ~ready
+
+        burned = np.zeros_like(ready)
+        burned[1:] = ready[:-1]
+        self.remove(burned)
+
+        game_over = ready[-1].any(axis=1)
+        self.game_over |= game_over
+
+        return game_over
+
+    def draw_letters(self, count: int) -> np.ndarray:
+        """ {{ count }} weighted random letters, as indexes into LETTER_CHOICES. """
+        return np.searchsorted(LETTER_PROBABILITIES, self.rng.random(count), side='right').astype(np.uint8)
+
+    def letters_of(self, board: int) -> list[str]:
+        """ {{ board }}'s letters by cell number, ready for solver.solve(). """
+        return [LETTER_CHOICES[i] for i in self.letters[:, board].T.ravel()]
+
+    def remove(self, removed: np.ndarray) -> np.ndarray:
+        """
+        Takes the cells in the {{ removed }} mask off their boards: in each column, removed cells move to the top with
+        new letters and no special type, and the rest keep their order below them. Returns the mask of refilled cells.
+
+        A kept cell drops one row for every removed cell below it, and the n-th removed cell from the top ends up in
+        row n, so every cell's new row falls out of a running count of removed cells down each column. Only columns
+        that lost a cell are touched.
+        """
+        shape = removed.shape
+        removed = removed.reshape(self.num_rows, -1)
+        columns = np.flatnonzero(removed.any(axis=0))  # Indexes of the (board, column) pairs that lost a cell
+        removed = removed[:, columns]
+
+        removed_so_far = np.empty(removed.shape, dtype=np.int8)
+        removed_so_far[0] = removed[0]
+        for row in range(1, self.num_rows):
+            np.add(removed_so_far[row - 1], removed[row], out=removed_so_far[row])
+        num_removed = removed_so_far[-1]
+
+        new_rows = np.where(removed, removed_so_far - 1, self.rows + num_removed - removed_so_far)
+        sources = np.empty(removed.size, dtype=np.intp)
+        sources[(new_rows * columns.size + np.arange(columns.size)).ravel()] = np.arange(removed.size)
+        refilled = self.rows < num_removed
+
+        for array, refill in ((self.letters, self.draw_letters(np.count_nonzero(refilled))), (self.types, NORMAL),
+                              (self.burn_ready, False)):
+            array = array.reshape(self.num_rows, -1)  # A view, so this writes through to the original
+            moved = array[:, columns].ravel()[sources].reshape(removed.shape)
+            moved[refilled] = refill
+            array[:, columns] = moved
+
+        all_refilled = np.zeros((self.num_rows, self.num_boards * self.num_columns), dtype=bool)
+        all_refilled[:, columns] = refilled
+
+        return all_refilled.reshape(shape)
+
+    def scramble(self, boards: np.ndarray):
+        """
+        Scrambles the boards picked by the {{ boards }} mask, like Board.scramble(): normal tiles get new letters, and
+        most of the time a normal tile in the top row turns into a fire tile that won't burn on its first turn.
+        """
+        scrambled = (self.types == NORMAL) & boards[:, None]
+        self.letters[scrambled] = self.draw_letters(int(np.count_nonzero(scrambled)))
+
+        top_row = self.types[0] == NORMAL
+        columns = np.where(top_row, self.rng.random(top_row.shape), -1).argmax(axis=1)
+        lit = np.flatnonzero(boards & top_row.any(axis=1) & (self.rng.random(self.num_boards) < SCRAMBLE_FIRE_CHANCE))
+
+        self.types[0, lit, columns[lit]] = BYPASSED_FIRE
+
+        self.set_fire_tiles_ready()
+
+    def set_fire_tiles_ready(self):
+        """
+        Readies fire tiles that have a normal tile (or the floor) below them, on boards that aren't game over. Tiles
+        marked BYPASSED_FIRE aren't readied and just turn back into plain fire tiles.
+        """
+        burnable = np.ones_like(self.burn_ready)
+        burnable[:-1] = self.types[1:] == NORMAL
+
+        self.burn_ready |= (self.types == FIRE) & burnable & ~self.game_over[:, None]
+        self.types[self.types == BYPASSED_FIRE] = FIRE
+
+    def submit(self, paths: np.ndarray, is_bonus: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Plays one path of cell numbers per board ({{ paths }} is shaped (boards, tiles), padded with -1); a row of -1s
+        skips that board. Paths are taken as given, so they should already be connected words. Scores each path like
+        engine.score_tiles(), with 3x for boards flagged in {{ is_bonus }}, removes its tiles, rolls for a crystal or
+        fire tile among them and readies fire tiles. Returns the scores.
+        """
+        num_boards = self.num_boards
+        is_bonus = np.zeros(num_boards, dtype=bool) if is_bonus is None else is_bonus
+
+        played = (paths >= 0) & ~self.game_over[:, None]
+        indexes = self.cell_offsets[np.where(played, paths, 0)] + np.arange(num_boards)[:, None] * self.num_columns
+        letters = self.letters.ravel()[indexes]
+        num_tiles = np.count_nonzero(played, axis=1)
+        word_lengths = np.where(played, LETTER_LENGTHS[letters], 0).sum(axis=1)
+
+        scores = np.where(played, LETTER_VALUES[letters], 0).sum(axis=1) * num_tiles * np.where(is_bonus, 3, 1)
+
+        removed = np.zeros(self.types.size, dtype=bool)
+        removed[indexes[played]] = True
+        removed = removed.reshape(self.types.shape)
+
+        # Fire tiles right above a submitted tile don't burn this turn. They're marked in place, so the mark moves
+        # with them as the column drops.
+        above_removed = np.zeros_like(removed)
+        above_removed[:-1] = removed[1:]
+        self.types[above_removed & (self.types == FIRE)] = BYPASSED_FIRE
+
+        self.remove(removed)
+
+        # A crystal tile and a fire tile aren't rolled together, and the bonus word never creates a fire tile
+        crystal = self.rng.random(num_boards) < CRYSTAL_CHANCE[np.minimum(word_lengths, len(CRYSTAL_CHANCE) - 1)]
+        fire = self.rng.random(num_boards) < FIRE_CHANCE[np.minimum(word_lengths, len(FIRE_CHANCE) - 1)]
+        fire &= ~crystal & ~is_bonus
+        boards = np.flatnonzero((crystal | fire) & (num_tiles > 0))
+
+        # Like Board.remove_tiles(), the special tile is picked by letter index, so a pick past the last tile (only
+        # possible with "Qu" tiles) creates none. Tiles are removed in path order, each going to the top of its
+        # column, so it ends up below the later tiles of the path from the same column.
+        picks = (self.rng.random(boards.size) * word_lengths[boards]).astype(np.intp)
+        on_tile = picks < num_tiles[boards]
+        boards, picks = boards[on_tile], picks[on_tile]
+        path_columns = np.where(played[boards], paths[boards] // self.num_rows, -1)
+        columns = path_columns[np.arange(boards.size), picks]
+        later = np.arange(paths.shape[1]) > picks[:, None]
+        rows = np.count_nonzero((path_columns == columns[:, None]) & later, axis=1)
+
+        self.types[rows, boards, columns] = np.where(crystal[boards], CRYSTAL, BYPASSED_FIRE)
+
+        self.set_fire_tiles_ready()
+
+        return scores
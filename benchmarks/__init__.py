@@ -0,0 +1,51 @@
+"""
+Micro-benchmarks for Textagons' hot paths. Each module can be run on its own from the repo root, e.g.:
+
+    python -m benchmarks.bench_dictionary
+
+or all together (see __main__.py), with JSON output and a comparison against an earlier run:
+
+    python -m benchmarks --json results.json --baseline baseline.json
+"""
+
+import os
+import timeit
+from pathlib import Path
+from typing import Callable
+
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def best_time(func: Callable, number: int = 1, repeat: int = 5) -> float:
+    """ Returns the fastest of {{ repeat }} runs of {{ func }}, in seconds per call. """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def init_pygame():
+    """ Starts pygame against SDL's dummy video driver, so benchmarks that need fonts or Surfaces run headlessly. """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+    import pygame
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def load_dictionary():
+    import dictionary
+    return dictionary.load(REPO_ROOT / 'assets' / 'dictionary.txt')
+
+
+def load_words() -> list[str]:
+    with open(REPO_ROOT / 'assets' / 'dictionary.txt') as file:
+        return [line.split(',')[0] for line in file.read().split('\n')]
+
+
+def report(title: str, results: dict[str, float], unit: str = 'us'):
+    """ Prints {{ results }}, which are in seconds when {{ unit }} is 'us' and in bytes when it's 'B'. """
+    scale = {'us': 1e6, 'B': 1}[unit]
+
+    print(title)
+    for name, value in results.items():
+        print(f'  {name:<40} {value * scale:>12.2f} {unit}')
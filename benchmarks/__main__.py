@@ -0,0 +1,96 @@
+import argparse
+import importlib
+import json
+import platform
+import sys
+from pathlib import Path
+
+from benchmarks import REPO_ROOT, report
+
+
+"""
+Runs every benchmark module (or the ones named) and optionally writes the results as JSON, or compares them against a
+baseline written by an earlier run. From the repo root:
+
+    python -m benchmarks --json baseline.json
+    python -m benchmarks --baseline baseline.json            # Exits with 1 if anything got more than 25% slower
+    python -m benchmarks dictionary render --baseline baseline.json --threshold 0.5
+
+Results are keyed by module (bench_<name>.py) and then by each module's result names. Times are in seconds and
+memory in bytes, and lower is better for both. Only results that are in both runs are compared, so renaming or adding
+a benchmark doesn't fail the comparison. Baselines are only comparable with runs on the same machine.
+"""
+
+
+def available() -> list[str]:
+    return sorted(path.stem.removeprefix('bench_') for path in Path(__file__).parent.glob('bench_*.py'))
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Prints how each result changed since {{ baseline }}, and returns the ones that got worse by more than
+    {{ threshold }} (0.25 is 25%).
+    """
+    regressions = []
+
+    print(f"Compared with {baseline['python']} on {baseline['machine']}:")
+    for module, values in results['benchmarks'].items():
+        for name, value in values.items():
+            old = baseline['benchmarks'].get(module, {}).get(name)
+            if not old:
+                continue
+
+            change = value / old - 1
+            flag = ''
+            if change > threshold:
+                regressions.append(f'{module}: {name}')
+                flag = '  <- regression'
+            print(f'  {module + ": " + name:<60} {change:>+8.1%}{flag}')
+
+    return regressions
+
+
+def run(names: list[str]) -> dict:
+    results = {'python': platform.python_version(), 'machine': platform.platform(), 'benchmarks': {}}
+
+    for name in names:
+        module = importlib.import_module(f'benchmarks.bench_{name}')
+        values = module.run()
+        report(module.TITLE, values, unit=getattr(module, 'UNIT', 'us'))
+        results['benchmarks'][name] = values
+
+    return results
+
+
+def main() -> bool:
+    """ Returns False if there were regressions. """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the Textagons benchmarks.')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f"benchmarks to run, out of {', '.join(available())}; defaults to all of them")
+    parser.add_argument('--json', type=Path, help='write the results to this file')
+    parser.add_argument('--baseline', type=Path, help='compare the results with this file, from an earlier --json')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='how much worse a result can get before it counts as a regression (default 0.25)')
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(available())
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    sys.path.insert(0, str(REPO_ROOT))  # The benchmarks import the game's top level modules
+    results = run(args.names or available())
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s):\n  ' + '\n  '.join(regressions))
+            return False
+
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
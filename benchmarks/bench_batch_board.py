@@ -0,0 +1,67 @@
+from random import Random
+
+import numpy as np
+
+from batch_board import BatchBoards
+from benchmarks import best_time, init_pygame, load_dictionary, report
+from engine import Board
+
+
+TITLE = 'Board moves (per board per move)'
+
+
+def random_vertical_paths(rng: np.random.Generator, num_boards: int, length: int = 3) -> np.ndarray:
+    """ One straight run of {{ length }} tiles down a random column per board, as flat cell indexes of a 7x7 board. """
+    columns = rng.integers(0, 7, num_boards)
+    rows = rng.integers(0, 7 - length + 1, num_boards)
+
+    return (columns * 7 + rows)[:, None] + np.arange(length)
+
+
+def run(num_boards: int = 1000, num_moves: int = 20, num_sprite_boards: int = 10) -> dict[str, float]:
+    init_pygame()
+
+    from assets.fonts import get_fonts
+    from engine import GameState
+    from main import create_tiles
+
+    fonts = get_fonts()
+    words = load_dictionary()
+    rng = np.random.default_rng(0)
+    moves = [random_vertical_paths(rng, num_boards) for _ in range(num_moves)]
+
+    def sprite_moves():
+        """ Each move as the game plays it: the board changes, then the sprites fall until they've settled. """
+        for index in range(num_sprite_boards):
+            game = GameState(words, seed=index)
+            tiles = create_tiles(game, 64, fonts)
+            for paths in moves:
+                board_tiles = [game.board.columns[cell // 7][cell % 7] for cell in paths[index].tolist()]
+                game.board.remove_tiles(board_tiles, word_length=len(board_tiles), is_bonus=False)
+                tiles.step()
+                while not tiles.is_all_at_target():
+                    tiles.step()
+
+    def engine_moves():
+        boards = [Board(7, 7, Random(i)) for i in range(num_boards)]
+        for paths in moves:
+            for board, path in zip(boards, paths.tolist()):
+                tiles = [board.columns[cell // 7][cell % 7] for cell in path]
+                board.remove_tiles(tiles, word_length=len(tiles), is_bonus=False)
+                board.burn()
+
+    def batch_moves():
+        boards = BatchBoards(num_boards, seed=0)
+        for paths in moves:
+            boards.submit(paths)
+            boards.burn()
+
+    return {
+        'TileGroup move + fall': best_time(sprite_moves, repeat=1) / (num_sprite_boards * num_moves),
+        'Board.remove_tiles + burn': best_time(engine_moves, repeat=3) / (num_boards * num_moves),
+        'BatchBoards.submit + burn': best_time(batch_moves, repeat=3) / (num_boards * num_moves),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
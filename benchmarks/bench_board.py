@@ -0,0 +1,61 @@
+from random import Random
+
+from benchmarks import best_time, init_pygame, load_dictionary, report
+
+
+TITLE = 'Board frame cost (per frame)'
+
+
+def per_tile_letters(board):
+    """ The old letter draw: one weighted choices() call per tile, rebuilding the weights list each time. """
+    from engine import LETTER_CHOICES, LETTER_WEIGHTS
+
+    for tile in board.tiles():
+        weights = [LETTER_WEIGHTS[l] for l in LETTER_CHOICES]
+        tile.set_letter(board.rng.choices(population=LETTER_CHOICES, weights=weights, k=1)[0])
+
+
+def scan_update_tile_targets(tiles):
+    """ The old per-frame target update, which scanned and sorted every sprite for every tile. """
+    def below(tile):
+        column = [t for t in tiles.sprites() if t.column == tile.column and t.rect.y > tile.rect.y]
+        return sorted(column, key=lambda t: t.rect.y)
+
+    bottom_row = [t for t in tiles.sprites() if not below(t)]
+    for tile in bottom_row:
+        y_offset = tile.rect.h / 2 - 6 if tile.column % 2 else -2
+        tile.target_y = (tiles.num_rows - 1) * (tile.rect.h - 8) + y_offset
+
+    for tile in [t for t in tiles.sprites() if t not in bottom_row]:
+        tile.target_y = below(tile)[0].rect.y - (tile.rect.h - 8)
+
+
+def run(sizes: tuple[int, ...] = (7, 14, 28)) -> dict[str, float]:
+    init_pygame()
+
+    from assets.fonts import get_fonts
+    from engine import Board, GameState
+    from main import create_tiles
+
+    fonts = get_fonts()
+    words = load_dictionary()
+    results = {}
+
+    board = Board(7, 7, Random(0))
+    results['per-tile letter draw (7x7, old)'] = best_time(lambda: per_tile_letters(board), 100)
+    results['Board.draw_letters (7x7)'] = best_time(lambda: board.draw_letters(49), 100)
+
+    for size in sizes:
+        tiles = create_tiles(GameState(words, size, size), 64, fonts)
+        if size <= 14:  # The old version grows quadratically; skipped on big boards to keep the run short
+            results[f'scan update_tile_targets ({size}x{size}, old)'] = best_time(
+                lambda: scan_update_tile_targets(tiles), repeat=3)
+        results[f'update_tile_targets ({size}x{size})'] = best_time(tiles.update_tile_targets, 100)
+        results[f'TileGroup.step ({size}x{size})'] = best_time(tiles.step, 10)
+        results[f'TileGroup.update ({size}x{size})'] = best_time(tiles.update, 10)
+
+    return results
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
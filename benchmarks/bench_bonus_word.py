@@ -0,0 +1,34 @@
+from random import choice
+
+from benchmarks import REPO_ROOT, best_time, report
+from dictionary import Dictionary, read_source
+from engine import R_VALUES
+
+
+TITLE = 'Bonus word selection (per pick)'
+
+
+def scan_word_pool(words_with_r_values: list[list], length: int) -> str:
+    """ The old selection: filter every word on each bonus hit. """
+    word_pool = [w[0] for w in words_with_r_values if len(w[0]) == length and w[1] > R_VALUES[length]]
+    return choice(word_pool)
+
+
+def run() -> dict[str, float]:
+    dictionary = read_source(REPO_ROOT / 'assets' / 'dictionary.txt')
+    words_with_r_values = [[w, r] for w, r in zip(dictionary.word_list, dictionary.r_values)]
+    dictionary.bonus_index
+
+    lengths = range(3, 13)
+    return {
+        'scan word pool (old)': best_time(lambda: [scan_word_pool(words_with_r_values, n) for n in lengths],
+                                          repeat=3) / len(lengths),
+        'Dictionary.choose_bonus_word': best_time(
+            lambda: [dictionary.choose_bonus_word(n, R_VALUES[n]) for n in lengths], 1000) / len(lengths),
+        'build Dictionary + bonus index': best_time(
+            lambda: Dictionary(dictionary.word_list, dictionary.r_values).bonus_index, repeat=3),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
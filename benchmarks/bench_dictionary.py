@@ -0,0 +1,53 @@
+import random
+
+from benchmarks import best_time, load_words, report
+from dictionary import Dictionary
+
+
+TITLE = 'Dictionary lookups (per call)'
+
+
+def run() -> dict[str, float]:
+    """
+    Times a word submission against the old list lookup and the Dictionary set, for words that are in the
+    dictionary (spread across the alphabet) and words that aren't (the worst case for a list, which scans it all).
+    The "per click" rows select each hit word a letter at a time, asking after every letter whether it could still
+    become a word: once by looking the whole selection up again, and once by moving a TrieCursor.
+    """
+    words = load_words()
+    dictionary = Dictionary(words)
+    rng = random.Random(0)
+    hits = rng.sample(words, 50)
+    misses = [''.join(rng.choices('bcdfghjklmnpqrstvwxz', k=5)) for _ in range(50)]
+    prefixes = [w[:3] for w in hits]
+    clicks = sum(len(w) for w in hits)
+
+    dictionary.trie  # Build up front so it isn't counted against the first prefix query
+    cursor = dictionary.cursor()
+
+    def rescan_selections():
+        for word in hits:
+            for length in range(1, len(word) + 1):
+                dictionary.has_prefix(word[:length])
+
+    def follow_selections():
+        for word in hits:
+            cursor.clear()
+            for letter in word:
+                cursor.push(letter)
+                cursor.is_prefix()
+
+    return {
+        'list lookup (hit)': best_time(lambda: [w in words for w in hits], repeat=3) / len(hits),
+        'list lookup (miss)': best_time(lambda: [w in words for w in misses], repeat=3) / len(misses),
+        'Dictionary.contains (hit)': best_time(lambda: [dictionary.contains(w) for w in hits], 1000) / len(hits),
+        'Dictionary.contains (miss)': best_time(lambda: [dictionary.contains(w) for w in misses], 1000) / len(misses),
+        'Dictionary.has_prefix': best_time(lambda: [dictionary.has_prefix(p) for p in prefixes], 1000) / len(prefixes),
+        'has_prefix of the selection (per click)': best_time(rescan_selections, 100) / clicks,
+        'TrieCursor.push (per click)': best_time(follow_selections, 100) / clicks,
+        'Dictionary.build_dawg': best_time(lambda: Dictionary.build_dawg(words), repeat=1),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
@@ -0,0 +1,48 @@
+from benchmarks import best_time, init_pygame, load_dictionary, report
+
+
+TITLE = 'Game moves and whole games'
+
+
+def run(num_games: int = 5, max_turns: int = 100) -> dict[str, float]:
+    init_pygame()
+
+    from random import Random
+
+    from assets.fonts import get_fonts
+    from engine import GameState
+    from main import create_tiles
+    from selfplay import play_game, play_greedy
+
+    words = load_dictionary()
+    words.trie
+    game = GameState(words, seed=0)
+    tiles = create_tiles(game, 64, get_fonts())
+    rng = Random(0)
+
+    def remove_and_refill():
+        """ A submitted word's cost to the board: its tiles move to the top with new letters and are lifted away. """
+        column = rng.randrange(game.board.num_columns)
+        row = rng.randrange(game.board.num_rows - 2)
+        path = game.board.columns[column][row:row + 3]
+        game.board.remove_tiles(path, word_length=3, is_bonus=False)
+        tiles.lift_removed_tiles()
+
+    turns = []
+
+    def play_games():
+        turns.clear()
+        for index in range(num_games):
+            turns.append(play_game(words, play_greedy, f'bench:{index}', max_turns).turns)
+
+    per_run = best_time(play_games, repeat=3)
+
+    return {
+        'Board.remove_tiles + lift_removed_tiles': best_time(remove_and_refill, 1000),
+        'self-play game, greedy (per game)': per_run / num_games,
+        'self-play game, greedy (per turn)': per_run / sum(turns),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
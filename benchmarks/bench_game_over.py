@@ -0,0 +1,75 @@
+import tracemalloc
+from timeit import default_timer
+
+from benchmarks import init_pygame, load_dictionary, report
+
+
+TITLE = 'Game-over screen (per frame)'
+MAX_HEAP_GROWTH = 16 * 1024  # Bytes; tracemalloc's own bookkeeping accounts for a few KB
+MAX_SLOWDOWN = 1.5  # How much slower the last frames can be than the first before it counts as a leak
+
+
+def run(num_frames: int = 5000, window: int = 500) -> dict[str, float]:
+    """
+    Holds the game-over screen open for {{ num_frames }} frames, asking for the menu every frame as the main loop used
+    to, and compares the first and last {{ window }} frames. Both should cost the same, and the heap and the number of
+    sprites shouldn't grow; fails if the sprites grew at all, the heap grew by more than {{ MAX_HEAP_GROWTH }}, or the
+    last frames were more than {{ MAX_SLOWDOWN }} times slower than the first.
+    """
+    init_pygame()
+
+    import pygame
+
+    from assets.fonts import get_fonts
+    from engine import GameState
+    from main import SCREEN_HEIGHT, SCREEN_WIDTH, get_highest_scoring
+    from renderer import DirtyRectRenderer
+    from ui import UIGroup
+
+    fonts = get_fonts()
+    game = GameState(load_dictionary(), seed=0)
+    game.longest = 'TEXTAGONS'
+    ui_group = UIGroup(fonts, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = DirtyRectRenderer(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+
+    def frame():
+        ui_group.show_game_over_menu(game.longest, get_highest_scoring(game), fonts)
+        ui_group.update()
+        renderer.draw(ui_group)
+
+    def frames(count: int, chunks: int = 5) -> float:
+        """ The fastest of {{ chunks }} runs of {{ count }} / {{ chunks }} frames, per frame, to ride out noise. """
+        times = []
+        for _ in range(chunks):
+            start = default_timer()
+            for _ in range(count // chunks):
+                frame()
+            times.append((default_timer() - start) / (count // chunks))
+        return min(times)
+
+    frame()
+    sprites_before = len(ui_group)
+    tracemalloc.start()
+    heap_before = tracemalloc.get_traced_memory()[0]
+
+    first = frames(window)
+    frames(num_frames - 2 * window)
+    last = frames(window)
+
+    heap_growth = tracemalloc.get_traced_memory()[0] - heap_before
+    tracemalloc.stop()
+    sprite_growth = len(ui_group) - sprites_before
+    print(f'{num_frames} frames: {sprite_growth} sprites and {heap_growth} bytes of heap added')
+
+    assert sprite_growth == 0, f'{sprite_growth} sprites were added to the UI over {num_frames} frames'
+    assert heap_growth <= MAX_HEAP_GROWTH, f'the heap grew by {heap_growth} bytes over {num_frames} frames'
+    assert last <= first * MAX_SLOWDOWN, f'the last {window} frames took {last / first:.2f}x as long as the first'
+
+    return {
+        f'first {window} frames': first,
+        f'last {window} frames': last,
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
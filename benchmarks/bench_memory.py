@@ -0,0 +1,95 @@
+import tracemalloc
+
+from benchmarks import init_pygame, load_dictionary, report
+
+
+TITLE = 'Memory (bytes per tile)'
+UNIT = 'B'
+
+
+def traced_bytes(func) -> tuple[int, object]:
+    """ Returns the Python heap growth while calling {{ func }}, and what it returned (so it's still alive). """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return after - before, result
+
+
+def swapped(module: object, name: str, replacement: object, func):
+    """ Calls {{ func }} with {{ module }}'s {{ name }} swapped for {{ replacement }}, and returns what it returned. """
+    original = getattr(module, name)
+    setattr(module, name, replacement)
+    try:
+        return func()
+    finally:
+        setattr(module, name, original)
+
+
+def run(size: int = 28) -> dict[str, float]:
+    """
+    The "old layout" rows rebuild the tiles as they were before TileState was slotted and tiles shared their hexagon
+    points, so the saving can be measured from the tree.
+    """
+    init_pygame()
+
+    import pygame
+
+    import engine
+    import main
+    from assets.fonts import get_fonts
+    from engine import Board, GameState, TileState
+    from main import create_tiles
+    from tile import GlyphAtlas, Tile
+
+    # TileState's methods without its slots, so every instance gets a __dict__
+    UnslottedTileState = type('UnslottedTileState', (), {k: v for k, v in vars(TileState).items()
+                                                          if k != '__slots__' and k not in TileState.__slots__})
+
+    class UnsharedTile(Tile):
+        """ Computes its own hexagon point lists, and starts with a placeholder Surface. """
+
+        def __init__(self, state: TileState, tile_size: int, coords: tuple[float], fonts: list[pygame.font.Font]):
+            super().__init__(state, tile_size, coords, fonts)
+
+            self.image = pygame.Surface((tile_size, tile_size))
+            self.inner_points = self.calculate_hexagon_points(center_x=tile_size / 2, center_y=tile_size / 2,
+                                                              radius=tile_size / 2 - 8)
+            self.outer_points = self.calculate_hexagon_points(center_x=tile_size / 2, center_y=tile_size / 2,
+                                                              radius=tile_size / 2 - 4)
+
+    fonts = get_fonts()
+    words = load_dictionary()
+    num_tiles = size * size
+
+    Board(size, size)  # Builds the cached neighbor table, which every board of this size shares
+    board_bytes, board = traced_bytes(lambda: Board(size, size))
+    old_board_bytes, old_board = swapped(engine, 'TileState', UnslottedTileState,
+                                         lambda: traced_bytes(lambda: Board(size, size)))
+    game = GameState(words, size, size)
+    GlyphAtlas.for_fonts(fonts)  # Likewise shared by every tile drawn with these fonts
+    def create_and_draw_tiles():
+        tiles = create_tiles(game, 64, fonts)
+        tiles.update()
+        return tiles
+
+    sprite_bytes, tiles = traced_bytes(create_and_draw_tiles)
+    old_sprite_bytes, old_tiles = swapped(main, 'Tile', UnsharedTile, lambda: traced_bytes(create_and_draw_tiles))
+
+    # Pixel data lives outside the Python heap, so count each distinct Surface the tiles hold once
+    surfaces = {id(t.image): t.image for t in tiles.sprites()}.values()
+    surface_bytes = sum(s.get_bytesize() * s.get_width() * s.get_height() for s in surfaces)
+
+    return {
+        'TileState (Python heap)': board_bytes / num_tiles,
+        'TileState, old layout (Python heap)': old_board_bytes / num_tiles,
+        'Tile sprite (Python heap)': sprite_bytes / num_tiles,
+        'Tile sprite, old layout (Python heap)': old_sprite_bytes / num_tiles,
+        'Tile sprite (Surface pixels)': surface_bytes / num_tiles,
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run(), unit=UNIT)
@@ -0,0 +1,72 @@
+from benchmarks import best_time, init_pygame, load_dictionary, report
+
+
+TITLE = 'Tile rendering (per frame)'
+
+
+def run() -> dict[str, float]:
+    init_pygame()
+
+    import pygame
+
+    from assets.fonts import get_fonts
+    from engine import GameState
+    from main import SCREEN_HEIGHT, SCREEN_WIDTH, create_tiles
+    from renderer import DirtyRectRenderer
+    from tile import SLOW_FLASH, Tile
+
+    tiles = create_tiles(GameState(load_dictionary()), 64, get_fonts())
+    board = tiles.sprites()
+    fire_board = create_tiles(GameState(load_dictionary()), 64, get_fonts()).sprites()
+    for tile in fire_board:
+        tile.state.type = 0
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = DirtyRectRenderer(screen)
+
+    def idle_frame():
+        for tile in board:
+            tile.update()
+
+    def uncached_frame():
+        """ What every frame used to cost: each tile redrawn from scratch. """
+        Tile.render_cache.clear()
+        for tile in board:
+            tile.render_key = None
+            tile.update()
+
+    def selection_frame():
+        """ A few tiles change state, as when the player clicks. """
+        for tile in board[:4]:
+            tile.toggle_mark()
+        idle_frame()
+
+    def fire_flash_frames():
+        """ A full slow flash of a board of fire tiles, from an empty cache: every color of every letter is drawn. """
+        Tile.render_cache.clear()
+        for _ in range(SLOW_FLASH):
+            for tile in fire_board:
+                tile.step()
+                tile.update()
+
+    def full_redraw():
+        """ The old main loop: background plus every sprite, every frame. """
+        screen.blit(renderer.background, (0, 0))
+        for tile in board:
+            screen.blit(tile.image, tile.rect)
+
+    idle_frame()
+    renderer.draw(board)
+
+    return {
+        'Tile.update x49, re-render every tile': best_time(uncached_frame, 20),
+        'Tile.update x49, idle board': best_time(idle_frame, 200),
+        'Tile.update x49, 4 tiles changed': best_time(selection_frame, 200),
+        'Tile.update x49, fire tiles flashing': best_time(fire_flash_frames, repeat=3) / SLOW_FLASH,
+        'draw board, full redraw': best_time(full_redraw, 200),
+        'draw board, DirtyRectRenderer idle': best_time(lambda: renderer.draw(board), 200),
+        'draw board, DirtyRectRenderer 4 changed': best_time(lambda: (selection_frame(), renderer.draw(board)), 200),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import tempfile
+import tracemalloc
+from pathlib import Path
+from timeit import default_timer
+
+from benchmarks import load_dictionary, report
+from server import MAX_REQUEST_SIZE, Client, GameServer
+
+
+TITLE = 'Game server under load (per request)'
+
+
+async def play_session(client: Client, rng: random.Random, num_moves: int) -> int:
+    """
+    Starts a session and makes {{ num_moves }} moves like a careless bot: mostly a straight run of 3 to 5 tiles down a
+    random column (which is rarely a word), sometimes a scramble. Returns the number of requests made.
+    """
+    state = await client.request('new', seed=rng.randrange(2 ** 32))
+    session = state['session']
+    num_columns, num_rows = len(state['letters']), len(state['letters'][0])
+
+    for _ in range(num_moves):
+        if state['game_over']:
+            state = await client.request('restart', session=session)
+        elif rng.random() < 0.2:
+            state = await client.request('scramble', session=session)
+        else:
+            length = rng.randint(3, 5)
+            column, row = rng.randrange(num_columns), rng.randrange(num_rows - length + 1)
+            state = await client.request('submit', session=session,
+                                         path=[[column, r] for r in range(row, row + length)])
+        assert state['ok'], state
+
+    await client.request('close', session=session)
+
+    return num_moves + 2
+
+
+async def load_test(words, num_sessions: int, num_connections: int, num_moves: int) -> dict[str, float]:
+    """
+    Plays {{ num_sessions }} sessions at once, spread over {{ num_connections }}, through a server in this process.
+    """
+    game_server = GameServer(words)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        unix_path = Path(temp_dir) / 'textagons.sock'
+        server = await asyncio.start_unix_server(game_server.serve_connection, unix_path, limit=MAX_REQUEST_SIZE)
+        clients = [await Client.connect(unix_path=unix_path) for _ in range(num_connections)]
+        rng = random.Random(0)
+
+        # Every session open at the same time, to see what they cost to hold
+        tracemalloc.start()
+        heap_before = tracemalloc.get_traced_memory()[0]
+        states = await asyncio.gather(*[clients[i % num_connections].request('new')
+                                        for i in range(num_sessions)])
+        heap_per_session = (tracemalloc.get_traced_memory()[0] - heap_before) / num_sessions
+        tracemalloc.stop()
+        await asyncio.gather(*[clients[i % num_connections].request('close', session=state['session'])
+                               for i, state in enumerate(states)])
+
+        start = default_timer()
+        requests = await asyncio.gather(*[play_session(clients[i % num_connections], random.Random(rng.random()),
+                                                       num_moves) for i in range(num_sessions)])
+        elapsed = default_timer() - start
+
+        for client in clients:
+            await client.close()
+        server.close()
+        await server.wait_closed()
+
+    print(f'{num_sessions} sessions over {num_connections} connections: {sum(requests) / elapsed:.0f} requests/s, '
+          f'{heap_per_session / 1024:.1f} KB of heap per open session')
+
+    return {f'{num_sessions} sessions x {num_moves} moves': elapsed / sum(requests)}
+
+
+def run(num_sessions: int = 2000, num_connections: int = 20, num_moves: int = 10) -> dict[str, float]:
+    return asyncio.run(load_test(load_dictionary(), num_sessions, num_connections, num_moves))
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
@@ -0,0 +1,35 @@
+from random import Random
+
+from benchmarks import best_time, load_dictionary, report
+from engine import Board
+from solver import solve, solve_board
+
+
+TITLE = 'Board solver (per board)'
+
+
+def run(num_boards: int = 200) -> dict[str, float]:
+    words = load_dictionary()
+    words.trie
+
+    board = Board(7, 7, Random(0))
+    tiles = board.tiles()
+    neighbors = [[c * board.num_rows + r for c, r in board.neighbor_table[t.column][t.row]] for t in tiles]
+
+    boards = []
+    for _ in range(num_boards):
+        for tile, letter in zip(tiles, board.draw_letters(len(tiles))):
+            tile.set_letter(letter)
+        boards.append(([t.letter for t in tiles], [t.value for t in tiles]))
+
+    found = [len(solve(letters, values, neighbors, words)) for letters, values in boards]
+    print(f'{sum(found) / num_boards:.0f} paths per board on average (min {min(found)}, max {max(found)})')
+
+    return {
+        'solve (7x7 board)': best_time(lambda: [solve(l, v, neighbors, words) for l, v in boards], repeat=3) / num_boards,
+        'solve_board (7x7 board)': best_time(lambda: solve_board(board, words), 20),
+    }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
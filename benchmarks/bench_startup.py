@@ -0,0 +1,39 @@
+import tempfile
+from pathlib import Path
+
+import dictionary
+from benchmarks import REPO_ROOT, best_time, report
+
+
+SOURCE = REPO_ROOT / 'assets' / 'dictionary.txt'
+TITLE = 'Dictionary startup (per load)'
+
+
+def parse_text_file():
+    """ The old startup path: two parallel lists filled from the text file. """
+    words, words_with_r_values = [], []
+    with open(SOURCE) as file:
+        for line in file.read().split('\n'):
+            entry = line.split(',')
+            words.append(entry[0])
+            words_with_r_values.append([entry[0], float(entry[1])])
+
+
+def run() -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = Path(temp_dir) / 'dictionary.cache'
+
+        def cold_load():
+            cache_path.unlink(missing_ok=True)
+            dictionary.load(SOURCE, cache_path)
+
+        return {
+            'parse text file (old)': best_time(parse_text_file),
+            'load, no cache (parse, build trie, write cache)': best_time(cold_load),
+            'load, fresh cache': best_time(lambda: dictionary.load(SOURCE, cache_path)),
+            'load, fresh cache, then trie': best_time(lambda: dictionary.load(SOURCE, cache_path).trie),
+        }
+
+
+if __name__ == '__main__':
+    report(TITLE, run())
@@ -0,0 +1,364 @@
+import os
+import random
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+"""
+Word lookups for Textagons.
+
+Membership checks (is this a word?) go through a plain set. Prefix queries (could this selection still become a word?)
+go through a DAWG: a trie in which identical suffix branches are shared, so the ~77k words in "dictionary.txt" fit into
+roughly 28k nodes instead of ~200k. Each node is a dict of letter -> child node, and a node that ends a word also holds
+the key {{ END }}. While the player builds a selection, a TrieCursor keeps their place in it, tile by tile.
+
+Parsing the text file (77k lines, one float() each) and building the DAWG are the slowest parts of startup, so both
+results are kept in a binary cache next to it. The cache is rebuilt whenever the text file's mtime or size no longer
+match its header.
+"""
+
+
+# Magic, source mtime (ns), source size, word, trie node and trie edge counts, words section size, CRC32 of the rest
+CACHE_HEADER = struct.Struct('<8sqqIIIII')
+CACHE_MAGIC = b'TXTDICT3'
+END = ''
+
+
+class Dictionary:
+
+    def __init__(self, words: Iterable[str], r_values: Optional[Iterable[float]] = None,
+                 packed_trie: Optional[tuple[array, array, str]] = None):
+        """
+        {{ r_values }} (each word's rarity, see main.py) lines up with {{ word_list }} by index. {{ packed_trie }} is
+        the words' DAWG as flattened by pack_trie(), if an earlier run already built it (see read_cache()).
+        """
+        self.word_list = list(words)
+        self.r_values = array('d', r_values if r_values is not None else [0] * len(self.word_list))
+        self.words = set(self.word_list)
+        self._bonus_index = None
+        self._packed_trie = packed_trie
+        self._trie = None
+
+    def __contains__(self, word: str) -> bool:
+        return self.contains(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def bonus_index(self) -> dict[int, tuple[list[float], list[str]]]:
+        """
+        Word length -> (R values, words), both sorted by R value, so the words in any rarity range are one contiguous
+        slice that can be found with bisect. Dictionaries coming from read_source() or the cache are already in that
+        order, so building the index is a single pass.
+        """
+        if self._bonus_index is None:
+            buckets = {}
+            for word, r_value in zip(self.word_list, self.r_values):
+                bucket = buckets.setdefault(len(word), ([], []))
+                bucket[0].append(r_value)
+                bucket[1].append(word)
+
+            for length, (r_values, words) in buckets.items():
+                if any(a > b for a, b in zip(r_values, r_values[1:])):
+                    order = sorted(range(len(words)), key=r_values.__getitem__)
+                    buckets[length] = ([r_values[i] for i in order], [words[i] for i in order])
+
+            self._bonus_index = buckets
+
+        return self._bonus_index
+
+    @staticmethod
+    def build_dawg(words: Iterable[str]) -> dict:
+        """
+        Builds a minimal DAWG from {{ words }} in one pass (Daciuk et al.). Words are processed in sorted order; once a
+        word no longer shares a prefix with the next one, the nodes for its tail can't change anymore, so they are
+        swapped for an identical node already in the register, if there is one.
+        """
+        root = {}
+        register = {}
+        unchecked = []  # (parent, letter, child) for nodes which may still gain children
+        previous = ''
+
+        def minimize(down_to: int):
+            while len(unchecked) > down_to:
+                parent, letter, child = unchecked.pop()
+                signature = tuple((key, id(node) if key else node) for key, node in child.items())
+                existing = register.get(signature)
+                if existing is None:
+                    register[signature] = child
+                else:
+                    parent[letter] = existing
+
+        for word in sorted(words):
+            common = 0
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+
+            minimize(common)
+
+            node = unchecked[-1][2] if unchecked else root
+            for letter in word[common:]:
+                child = {}
+                node[letter] = child
+                unchecked.append((node, letter, child))
+                node = child
+            node[END] = True
+
+            previous = word
+
+        minimize(0)
+
+        return root
+
+    def choose_bonus_word(self, length: int, min_rarity: float = 0, max_rarity: Optional[float] = None,
+                          rng: Optional[random.Random] = None) -> Optional[str]:
+        """
+        Picks a random word of {{ length }} letters whose R value is greater than {{ min_rarity }} and, if given, no
+        greater than {{ max_rarity }}. Returns None if no word fits. The pick comes from {{ rng }} if given, otherwise
+        from the random module's global generator.
+        """
+        try:
+            r_values, words = self.bonus_index[length]
+        except KeyError:
+            return None
+
+        start = bisect_right(r_values, min_rarity)
+        stop = len(r_values) if max_rarity is None else bisect_right(r_values, max_rarity)
+        if start >= stop:
+            return None
+
+        return words[(rng or random).choice(range(start, stop))]
+
+    def contains(self, word: str) -> bool:
+        return word.lower() in self.words
+
+    def cursor(self) -> 'TrieCursor':
+        return TrieCursor(self.trie)
+
+    def find_node(self, prefix: str) -> Optional[dict]:
+        """ Returns the trie node reached by following {{ prefix }}, or None if no word starts with it. """
+        node = self.trie
+        for letter in prefix.lower():
+            node = node.get(letter)
+            if node is None:
+                return None
+
+        return node
+
+    def has_prefix(self, prefix: str) -> bool:
+        return self.find_node(prefix) is not None
+
+    @property
+    def trie(self) -> dict:
+        """
+        Made the first time a prefix query is made, since a plain word check never needs it: unpacked from the cache
+        when there is one (see load()), and built otherwise.
+        """
+        if self._trie is None:
+            if self._packed_trie:
+                self._trie = unpack_trie(*self._packed_trie)
+                self._packed_trie = None
+            else:
+                self._trie = self.build_dawg(self.words)
+
+        return self._trie
+
+    def words_with_prefix(self, prefix: str) -> list[str]:
+        """ Returns every word starting with {{ prefix }}, in alphabetical order. """
+        prefix = prefix.lower()
+        node = self.find_node(prefix)
+        if node is None:
+            return []
+
+        found = []
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            if END in node:
+                found.append(word)
+            for letter in sorted((k for k in node if k), reverse=True):
+                stack.append((word + letter, node[letter]))
+
+        return found
+
+
+class TrieCursor:
+    """
+    Follows the player's selection through a trie one tile at a time, so knowing whether the selection is a word, or
+    could still become one, never means walking the trie from the root again. {{ self.nodes }} holds the node reached
+    after each tile (None once no word starts with the selection), so selecting a tile costs a dict lookup per letter,
+    and trimming the selection back to any length just drops nodes off the end.
+    """
+
+    def __init__(self, trie: dict):
+        self.nodes = [trie]
+
+    def __len__(self) -> int:
+        """ The number of tiles followed. """
+        return len(self.nodes) - 1
+
+    def clear(self):
+        del self.nodes[1:]
+
+    def is_prefix(self) -> bool:
+        """ True if some word starts with the selection (including the selection itself). """
+        return self.nodes[-1] is not None
+
+    def is_word(self) -> bool:
+        node = self.nodes[-1]
+        return node is not None and END in node
+
+    def push(self, letter: str):
+        """ Follows one tile's {{ letter }}, which may be more than one letter long (e.g. "Qu"). """
+        node = self.nodes[-1]
+        for char in letter.lower():
+            if node is None:
+                break
+            node = node.get(char)
+
+        self.nodes.append(node)
+
+    def truncate(self, length: int):
+        """ Goes back to the node after the first {{ length }} tiles. """
+        del self.nodes[length + 1:]
+
+
+def pack_trie(root: dict) -> tuple[array, array, bytes]:
+    """
+    Flattens the DAWG under {{ root }} for the cache. Nodes are numbered breadth first, from 0 for the root, and shared
+    nodes are only numbered once. Returns each node's edge count times two, plus one if it ends a word; the child of
+    every edge, node by node; and the letter of every edge, in the same order.
+    """
+    numbers = {id(root): 0}
+    nodes = [root]
+    counts, children, letters = array('H'), array('I'), []
+
+    for node in nodes:  # Grows as new children are numbered
+        edges = [(letter, child) for letter, child in node.items() if letter]
+        counts.append(len(edges) * 2 + (END in node))
+        for letter, child in edges:
+            if id(child) not in numbers:
+                numbers[id(child)] = len(nodes)
+                nodes.append(child)
+            children.append(numbers[id(child)])
+            letters.append(letter)
+
+    return counts, children, ''.join(letters).encode('ascii')
+
+
+def read_cache(cache_path: Path, source_stat: os.stat_result) -> Optional[Dictionary]:
+    """
+    Returns None if the cache is missing, unreadable, truncated or corrupt, or was built from a different version of
+    the source, so that load() rebuilds it.
+    """
+    try:
+        data = cache_path.read_bytes()
+        magic, mtime_ns, size, count, node_count, edge_count, words_size, crc = CACHE_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+
+    if magic != CACHE_MAGIC or mtime_ns != source_stat.st_mtime_ns or size != source_stat.st_size:
+        return None
+
+    r_values, counts, children = array('d'), array('H'), array('I')
+    counts_offset = CACHE_HEADER.size + count * r_values.itemsize
+    children_offset = counts_offset + node_count * counts.itemsize
+    letters_offset = children_offset + edge_count * children.itemsize
+    words_offset = letters_offset + edge_count
+    if len(data) != words_offset + words_size or not node_count or zlib.crc32(data[CACHE_HEADER.size:]) != crc:
+        return None
+
+    try:
+        r_values.frombytes(data[CACHE_HEADER.size:counts_offset])
+        counts.frombytes(data[counts_offset:children_offset])
+        children.frombytes(data[children_offset:letters_offset])
+        letters = data[letters_offset:words_offset].decode('ascii')
+        words = data[words_offset:].decode('ascii').split('\n')
+    except ValueError:  # Includes UnicodeDecodeError
+        return None
+
+    # The trie is only unpacked when it's first needed, so make sure it will unpack now
+    if len(words) != count or sum(c >> 1 for c in counts) != edge_count or max(children, default=0) >= node_count:
+        return None
+
+    return Dictionary(words, r_values, (counts, children, letters))
+
+
+def read_source(source_path: Path) -> Dictionary:
+    """
+    Parses "dictionary.txt", where each line is a lowercase word and its R value, separated by a comma. Words are
+    returned ordered by length, then R value (see Dictionary.bonus_index).
+    """
+    entries = []
+    with open(source_path) as file:
+        for line in file.read().split('\n'):
+            entry = line.split(',')
+            entries.append((len(entry[0]), float(entry[1]), entry[0]))
+    entries.sort()
+
+    return Dictionary([e[2] for e in entries], [e[1] for e in entries])
+
+
+def unpack_trie(counts: array, children: array, letters: str) -> dict:
+    """ Rebuilds the DAWG flattened by pack_trie(), and returns its root. """
+    nodes = [{} for _ in counts]
+    targets = [nodes[child] for child in children]
+    edge = 0
+
+    for node, count in zip(nodes, counts):
+        next_edge = edge + (count >> 1)
+        node.update(zip(letters[edge:next_edge], targets[edge:next_edge]))
+        if count & 1:
+            node[END] = True
+        edge = next_edge
+
+    return nodes[0]
+
+
+def write_cache(cache_path: Path, source_stat: os.stat_result, dictionary: Dictionary):
+    """
+    Layout: header, then one (native byte order) double per word, then the trie (see pack_trie(); node counts as
+    unsigned shorts, children as unsigned ints, letters as bytes), then the words joined by newlines. The header ends
+    with the size of the words and a CRC32 of everything after it, so read_cache() can tell a damaged cache from a
+    good one. Written to a temp file and moved into place so a half-written cache is never read. Failing to write
+    (e.g. a read-only install) is not an error; the next start will just parse the text file again.
+    """
+    counts, children, letters = pack_trie(dictionary.trie)
+    words = '\n'.join(dictionary.word_list).encode('ascii')
+    payload = b''.join((dictionary.r_values.tobytes(), counts.tobytes(), children.tobytes(), letters, words))
+    header = CACHE_HEADER.pack(CACHE_MAGIC, source_stat.st_mtime_ns, source_stat.st_size, len(dictionary.word_list),
+                               len(counts), len(children), len(words), zlib.crc32(payload))
+    temp_path = cache_path.with_suffix('.tmp')
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(header)
+            file.write(payload)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+
+def load(source_path: Path, cache_path: Optional[Path] = None) -> Dictionary:
+    """ Loads {{ source_path }} from its binary cache, (re)building the cache first if it's missing or stale. """
+    cache_path = source_path.with_suffix('.cache') if cache_path is None else cache_path
+    source_stat = source_path.stat()
+
+    dictionary = read_cache(cache_path, source_stat)
+    if dictionary is None:
+        dictionary = read_source(source_path)
+        write_cache(cache_path, source_stat, dictionary)
+
+    return dictionary
+
+
+if __name__ == '__main__':  # Build step: python dictionary.py
+    source = Path(__file__).parent / 'assets' / 'dictionary.txt'
+    load(source)
+    print(f'Cached {source}')
@@ -0,0 +1,531 @@
+from itertools import accumulate
+from random import Random
+from string import ascii_uppercase
+from typing import Callable, NamedTuple, Optional, Sequence
+
+from dictionary import Dictionary
+from hex_grid import neighbor_table
+
+
+"""
+The rules of Textagons, with no pygame involved: the board and its tiles, scoring, the bonus word, fire and crystal
+tiles, and the player's word history. The pygame front end (main.py, TileGroup, Tile) only draws this state and turns
+clicks into calls to GameState, so whole games can also be played headlessly, e.g. by a bot or in tests.
+
+A tile's slot on the board is its (column, row), with row 0 at the top. Removing a tile moves it to row 0 of its
+column with a new letter, and the tiles that were above it each drop down a row.
+
+Every random choice (letters, special tile rolls, bonus words) comes from the game's own Random, {{ GameState.rng }},
+so two games started with the same seed and given the same moves play out identically.
+"""
+
+
+LETTER_CHOICES = [c if c != 'Q' else 'Qu' for c in ascii_uppercase]
+LETTER_WEIGHTS = { 'A': 0.09, 'B': 0.02, 'C': 0.02, 'D': 0.04, 'E': 0.12, 'F': 0.02, 'G': 0.03, 'H':  0.02, 'I': 0.09,
+                   'J': 0.01, 'K': 0.01, 'L': 0.04, 'M': 0.03, 'N': 0.06, 'O': 0.08, 'P': 0.02, 'Qu': 0.01, 'R': 0.06,
+                   'S': 0.05, 'T': 0.06, 'U': 0.04, 'V': 0.02, 'W': 0.02, 'X': 0.01, 'Y': 0.02, 'Z': 0.01 }
+LETTER_CUM_WEIGHTS = list(accumulate(LETTER_WEIGHTS[l] for l in LETTER_CHOICES))
+R_VALUES = [0, 0, 0, 0.16, 0.22, 0.28, 0.36, 0.42, 0.48, 0.55, 0.61, 0.68,
+            0.74, 0.8, 0.87, 0.93, 0.99, 1.07, 1.13, 1.28, 1.31, 1.38]
+
+
+class TileState:
+    """
+    Everything about a tile that matters to the rules. Sprites (see tile.py) draw one of these. Slotted, since a board
+    holds one per tile and simulations create a lot of boards.
+    """
+
+    __slots__ = ('burn_ready', 'column', 'letter', 'marked', 'row', 'selected', 'type', 'value')
+
+    def __init__(self, column: int, row: int, letter: str):
+        self.burn_ready = False
+        self.column = column
+        self.letter = ''
+        self.marked = False
+        self.row = row
+        self.selected = False
+        self.type = 1  # 0: Fire, 1: Normal, 2: Crystal
+        self.value = 0
+
+        self.set_letter(letter)
+
+    def deselect(self):
+        self.selected = False
+
+    def lookup_letter_value(self, letter: str) -> int:
+        """ Crystal tiles are worth 2x normal value. Fire tiles are always worth 0 points. """
+        match letter:
+            case 'A' | 'E' | 'I' | 'L' | 'N' | 'O' | 'R' | 'S' | 'T' | 'U':
+                return 1 * self.type
+            case 'D' | 'G':
+                return 2 * self.type
+            case 'B' | 'C' | 'M' | 'P':
+                return 3 * self.type
+            case 'F' | 'H' | 'V' | 'W' | 'Y':
+                return 4 * self.type
+            case 'K':
+                return 5 * self.type
+            case 'J' | 'X':
+                return 8 * self.type
+            case _:
+                return 10 * self.type
+
+    def remove(self, letter: str):
+        """ Resets tile state and gives the tile {{ letter }}. """
+        self.set_type(1)
+        self.burn_ready = False
+        self.scramble(letter)
+
+    def scramble(self, letter: str):
+        self.deselect()
+
+        if self.type == 1:  # Special tiles can't be scrambled away
+            self.unmark()
+            self.set_letter(letter)
+
+    def select(self):
+        self.selected = True
+
+    def set_letter(self, letter: str):
+        self.letter = letter
+        self.value = self.lookup_letter_value(letter)
+
+    def set_type(self, tile_type: int):
+        self.type = tile_type  # 0: Fire, 1: Normal, 2: Crystal
+
+    def toggle_mark(self):
+        if not self.selected:
+            self.marked = not self.marked
+
+    def unmark(self):
+        self.marked = False
+
+
+class Submission(NamedTuple):
+    word: str
+    score: int
+    is_bonus: bool
+
+
+class Board:
+    """
+    The grid of tiles. {{ self.columns }} holds each column's tiles from top to bottom, and each tile's index there is
+    its {{ tile.row }}. A front end that needs to animate removed tiles can set {{ self.removed }} to a list; tiles
+    taken off the board are then appended to it, and it's up to the front end to clear it. Headless games leave it as
+    None, so nothing piles up.
+    All of the board's randomness comes from {{ self.rng }}.
+    """
+
+    def __init__(self, num_columns: int, num_rows: int, rng: Optional[Random] = None):
+        self.rng = Random() if rng is None else rng
+        self.num_columns = num_columns
+        self.num_rows = num_rows
+
+        letters = iter(self.draw_letters(num_columns * num_rows))
+        self.columns = [[TileState(column, row, next(letters)) for row in range(num_rows)]
+                        for column in range(num_columns)]
+        self.fire_tile_set = set()  # Kept in step with tile types by set_tile_type() and remove_tile()
+        self.neighbor_table = neighbor_table(num_columns, num_rows)
+        self.removed = None
+
+    def roll_for_crystal_tile(self, word_length: int) -> int:
+        """
+        Check if the submitted word will result in a crystal tile being created. If so, this method will return the
+        index of that tile among selected tiles; otherwise it will return 99.
+        Words shorter than 5 letters will not produce a crystal tile.
+        """
+        if word_length < 5:
+            return 99
+
+        match word_length:
+            case 5:
+                roll_target = 13
+            case 6:
+                roll_target = 7
+            case 7:
+                roll_target = 6
+            case _:
+                return self.rng.choice(range(word_length))
+
+        if self.rng.choice(range(20)) + 1 >= roll_target:
+            return self.rng.choice(range(word_length))
+        else:
+            return 99
+
+    def roll_for_fire_tile(self, word_length: int) -> int:
+        """
+        Check if the submitted word will result in a fire tile being created. If so, this method will return the index
+        of that tile among selected tiles; otherwise it will return 99.
+        Words longer than 5 letters never produce a fire tile.
+        5-letter words have a 5% chance to produce a fire tile, up to 80% for 3-letter words.
+        """
+        match word_length:
+            case 3:
+                roll_target = 4
+            case 4:
+                roll_target = 17
+            case 5:
+                roll_target = 20
+            case _:
+                return 99
+
+        if self.rng.choice(range(20)) + 1 >= roll_target:
+            return self.rng.choice(range(word_length))
+        else:
+            return 99
+
+    def bottom_row(self) -> list[TileState]:
+        return [column[-1] for column in self.columns]
+
+    def burn(self, settled: Optional[Callable[[TileState], bool]] = None) -> bool:
+        """
+        Lets every fire tile that is ready burn through its neighbor below. {{ settled }} can hold a tile back, e.g.
+        while its sprite is still falling. Returns True if a fire tile burned through the bottom row (Game Over).
+        """
+        game_over = False
+
+        for fire_tile in self.fire_tiles():
+            if fire_tile.burn_ready and (settled is None or settled(fire_tile)):
+                if self.burn_down(fire_tile):
+                    game_over = True
+
+        return game_over
+
+    def burn_down(self, fire_tile: TileState) -> bool:
+        """
+        Causes individual fire tiles to burn through their neighbors below.
+        Also checks for and returns "Game Over" condition (bool).
+        """
+        fire_tile.burn_ready = False
+
+        tiles_below = self.get_tiles_below_tile(fire_tile)
+        if tiles_below:
+            self.remove_tile(tiles_below[0])
+            return False
+        else:
+            return True  # Game over
+
+    def deselect(self):
+        for tile in self.tiles():
+            tile.deselect()
+
+    def draw_letters(self, count: int) -> list[str]:
+        """ Draws {{ count }} weighted random letters in one call, e.g. for a whole scramble or a submitted word. """
+        return self.rng.choices(LETTER_CHOICES, cum_weights=LETTER_CUM_WEIGHTS, k=count)
+
+    def fire_tiles(self) -> list[TileState]:
+        """ Ordered left to right, then top to bottom. """
+        return sorted(self.fire_tile_set, key=lambda tile: (tile.column, tile.row))
+
+    def get_neighbors(self, tile: TileState) -> list[TileState]:
+        return [self.columns[column][row] for column, row in self.neighbor_table[tile.column][tile.row]]
+
+    def get_tiles_above_tile(self, tile: TileState) -> list[TileState]:
+        """ Returns the tiles above {{ tile }} in its column, with the one directly above it at index 0. """
+        return self.columns[tile.column][tile.row - 1::-1] if tile.row else []
+
+    def get_tiles_below_tile(self, tile: TileState) -> list[TileState]:
+        """ Returns the tiles below {{ tile }} in its column, with the one directly below it at index 0. """
+        return self.columns[tile.column][tile.row + 1:]
+
+    def is_path(self, tiles: Sequence[TileState]) -> bool:
+        """ Checks that {{ tiles }} are distinct tiles on this board, each one touching the one before it. """
+        if len(set(map(id, tiles))) != len(tiles):
+            return False
+
+        for tile in tiles:
+            if self.columns[tile.column][tile.row] is not tile:
+                return False
+
+        return all(b in self.get_neighbors(a) for a, b in zip(tiles, tiles[1:]))
+
+    def remove_tiles(self, tiles: Sequence[TileState], word_length: int, is_bonus: bool):
+        """
+        Removes a submitted word's {{ tiles }}. Checks {{ word_length }} to see if special tile types should be
+        created. A crystal tile and a fire tile will not be created at the same time. A fire tile will not be created
+        if the player has just submitted the bonus word.
+
+        Also sets fire tiles ready to burn down, but bypasses any that have just been created, or whose neighbor tile
+        directly below was just submitted in a word.
+        """
+        crystal_tile_index = self.roll_for_crystal_tile(word_length)
+        if crystal_tile_index == 99 and not is_bonus:
+            fire_tile_index = self.roll_for_fire_tile(word_length)
+        else:
+            fire_tile_index = 99
+
+        bypassed_fire_tiles = []
+        letters = self.draw_letters(len(tiles))
+
+        for index, tile in enumerate(tiles):
+            tiles_above = self.get_tiles_above_tile(tile)
+            if tiles_above:
+                tile_above = tiles_above[0]
+                if tile_above.type == 0:
+                    bypassed_fire_tiles.append(tile_above)
+
+            self.remove_tile(tile, letters[index])
+
+            if index == crystal_tile_index:
+                self.set_tile_type(tile, 2)
+            elif index == fire_tile_index:
+                self.set_tile_type(tile, 0)
+                bypassed_fire_tiles.append(tile)
+
+        self.set_fire_tiles_ready(bypassed=bypassed_fire_tiles)
+
+    def remove_tile(self, tile: TileState, letter: Optional[str] = None):
+        """
+        Gives {{ tile }} a new letter ({{ letter }}, or a random one) and moves it to the top of its column; the tiles
+        above it drop a row.
+        """
+        tile.remove(self.draw_letters(1)[0] if letter is None else letter)
+        self.fire_tile_set.discard(tile)
+
+        column = self.columns[tile.column]
+        del column[tile.row]
+        column.insert(0, tile)
+        for row, column_tile in enumerate(column[:tile.row + 1]):
+            column_tile.row = row
+
+        if self.removed is not None:
+            self.removed.append(tile)
+
+    def scramble(self):
+        """
+        Changes all tiles' letters. Scrambling also has a 90% chance to create a fire tile in the top row. These tiles
+        will not replace crystal or existing fire tiles.
+        New fire tiles will not burn down through their neighbors on the first turn they appear.
+        """
+        for tile, letter in zip(self.tiles(), self.draw_letters(self.num_columns * self.num_rows)):
+            tile.scramble(letter)
+
+        top_row_tiles = [t for t in self.top_row() if t.type == 1]
+        bypassed = []
+        if self.rng.choice(range(10)) >= 2 and top_row_tiles:  # The top row may be all special tiles
+            fire_tile = top_row_tiles[self.rng.choice(range(len(top_row_tiles)))]
+            self.set_tile_type(fire_tile, 0)
+            bypassed = [fire_tile]
+
+        self.set_fire_tiles_ready(bypassed)
+
+    def selected(self) -> list[TileState]:
+        return [t for t in self.tiles() if t.selected]
+
+    def set_fire_tiles_ready(self, bypassed: Optional[list[TileState]] = None):
+        bypassed = [] if bypassed is None else bypassed
+
+        for fire_tile in self.fire_tiles():
+            if not fire_tile in bypassed:
+                if self.will_burn_down(fire_tile, self.selected()):
+                    fire_tile.burn_ready = True
+
+    def set_tile_type(self, tile: TileState, tile_type: int):
+        tile.set_type(tile_type)
+
+        if tile_type == 0:
+            self.fire_tile_set.add(tile)
+        else:
+            self.fire_tile_set.discard(tile)
+
+    def set_type(self, tile_type: int):
+        for tile in self.tiles():
+            self.set_tile_type(tile, tile_type)
+
+    def tile_at(self, column: int, row: int) -> TileState:
+        return self.columns[column][row]
+
+    def tiles(self) -> list[TileState]:
+        """ Every tile, column by column, top to bottom. """
+        return [tile for column in self.columns for tile in column]
+
+    def top_row(self) -> list[TileState]:
+        return [column[0] for column in self.columns]
+
+    def unmark(self):
+        for tile in self.tiles():
+            tile.unmark()
+
+    def will_burn_down(self, tile: TileState, selected: list[TileState]) -> bool:
+        """
+        Checks if a fire tile will burn through its neighbor below. Fire tiles will not burn through crystal tiles or
+        other fire tiles.
+        Returns False if the fire tile in question is selected, since it will be removed before the 'burn down' phase
+        is reached.
+        Returns True if the fire tile has no neighbor below, since a fire tile burning through the bottom row ends the
+        game.
+        """
+        if not tile.type == 0 or tile in selected:
+            return False
+
+        try:
+            return self.get_tiles_below_tile(tile)[0].type == 1
+        except IndexError:
+            return True
+
+
+class GameState:
+    """
+    One game of Textagons. Moves go through submit(), scramble(), tick() and reset(); everything else is state to
+    read. {{ self.history }} lists every accepted word in order, while {{ self.longest }} and
+    {{ self.highest_scoring }} back the history and game over menus.
+    {{ seed }} seeds {{ self.rng }}, which the board shares; None picks a seed from the OS as random.Random() does.
+    Setting {{ self.log }} to a list records every move (and every burn, since a front end decides when those happen)
+    as a JSON-ready dict, which is what replays are made of (see replay.py). Whoever sets it drains it.
+    """
+
+    def __init__(self, dictionary: Dictionary, num_columns: int = 7, num_rows: int = 7,
+                 seed: Optional[int | str] = None):
+        self.dictionary = dictionary
+        self.seed = seed
+        self.rng = Random(seed)
+        self.board = Board(num_columns, num_rows, self.rng)
+        self.bonus_word = ''
+        self.bonus_word_length = 2
+        self.game_over = False
+        self.highest_scoring = None
+        self.history = []
+        self.log = None
+        self.longest = ''
+        self.score = 0
+
+        self.reset()
+
+    def add_word_to_history(self, tiles: Sequence[TileState], submission: Submission):
+        """
+        Updates longest and highest scoring words. The highest scoring word keeps each letter's tile type too, so its
+        letters can be shown in their tile colors.
+        """
+        self.history.append(submission)
+
+        if len(submission.word) > len(self.longest):
+            self.longest = submission.word
+
+        if self.highest_scoring is None or submission.score > self.highest_scoring['value']:
+            self.highest_scoring = {
+                'letters': [t.letter.upper() for t in tiles],
+                'types': [t.type for t in tiles],
+                'is_bonus': submission.is_bonus,
+                'value': submission.score
+            }
+
+    def add_to_log(self, event: dict):
+        if self.log is not None:
+            self.log.append(event)
+
+    def choose_new_bonus_word(self):
+        """
+        Chooses a new bonus word based on the length of the previous bonus word + 1. This choice takes the hardcoded
+        "R values" (rarity) into account, which makes sure the chosen word isn't too easy to find.
+        If no word of that length is rare enough, any word of that length will do, then shorter words; with no words
+        to choose from at all (e.g. an empty dictionary) there's no bonus word, which no submission can match.
+        """
+        if self.bonus_word_length < 12:
+            self.bonus_word_length += 1
+
+        for length in range(self.bonus_word_length, 2, -1):
+            for min_rarity in (R_VALUES[length], 0):
+                word = self.dictionary.choose_bonus_word(length, min_rarity=min_rarity, rng=self.rng)
+                if word:
+                    self.bonus_word = word.upper()
+                    return
+
+        self.bonus_word = ''
+
+    def reset(self):
+        """ Starts a new game on the same board: fresh letters, no special tiles, and a 3-letter bonus word. """
+        self.score = 0
+        self.bonus_word = ''
+        self.bonus_word_length = 2  # choose_new_bonus_word ticks this up by 1, so we
+        self.highest_scoring = None  # start at 2 to begin the game with a 3-letter word.
+        self.history = []
+        self.longest = ''
+        self.game_over = False
+        self.choose_new_bonus_word()
+
+        self.board.deselect()
+        self.board.scramble()
+        self.board.set_type(1)  # Clear any fire tiles created by scrambling
+
+        self.add_to_log({'type': 'restart'})
+
+    def scramble(self):
+        self.board.scramble()
+        self.add_to_log({'type': 'scramble'})
+
+    def submit(self, tiles: Sequence[TileState]) -> Optional[Submission]:
+        """
+        Plays {{ tiles }} as a word. If they form a connected path that spells a word in the dictionary, scores it,
+        removes its tiles from the board and returns the result; otherwise the board is left alone and None is
+        returned.
+        """
+        if not is_valid_word_length(tiles) or not self.board.is_path(tiles):
+            return None
+
+        word = get_word_from_tiles(tiles)
+        if not self.dictionary.contains(word):
+            return None
+
+        path = [[t.column, t.row] for t in tiles]  # Before the tiles move
+
+        bonus_mult = 1
+        if word == self.bonus_word:
+            bonus_mult = 3
+            self.choose_new_bonus_word()
+
+        submission = Submission(word, score_tiles(tiles, bonus_mult), bonus_mult == 3)
+        self.score += submission.score
+        self.add_word_to_history(tiles, submission)
+
+        self.board.remove_tiles(tiles, word_length=len(word), is_bonus=submission.is_bonus)
+        self.add_to_log({'type': 'submit', 'path': path, 'word': word, 'score': submission.score})
+
+        return submission
+
+    def tick(self, settled: Optional[Callable[[TileState], bool]] = None) -> bool:
+        """
+        Lets ready fire tiles burn down (see Board.burn()). Returns True on the tick a fire tile burns through the
+        bottom row; {{ self.game_over }} stays True after that until reset().
+        """
+        burned = []  # [column, row] of each fire tile that burns, as it's about to
+
+        def settled_and_logged(tile: TileState) -> bool:
+            if settled is None or settled(tile):
+                burned.append([tile.column, tile.row])
+                return True
+            return False
+
+        game_over = self.board.burn(settled_and_logged)
+
+        if burned:
+            event = {'type': 'burn', 'tiles': burned}
+            if game_over:
+                event.update(game_over=True, score=self.score)
+            self.add_to_log(event)
+
+        if game_over:
+            self.game_over = True
+
+        return game_over
+
+
+def get_word_from_tiles(tiles: Sequence[TileState]) -> str:
+    return ''.join([t.letter for t in tiles]).upper()
+
+
+def is_valid_word_length(tiles: Sequence[TileState]) -> bool:
+    """
+    To submit a word, it must contain at least 3 letters, which could be on 2 or 3 tiles, depending on if the player
+    selected a "Qu" tile.
+    """
+    if len(tiles) > 2:
+        return True
+
+    if len(tiles) == 2 and 'Qu' in [t.letter for t in tiles]:
+        return True
+
+    return False
+
+
+def score_tiles(tiles: Sequence[TileState], bonus_mult: int) -> int:
+    return sum([t.value for t in tiles]) * len(tiles) * bonus_mult
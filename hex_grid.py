@@ -0,0 +1,29 @@
+from functools import cache
+
+
+"""
+The board is a grid of flat-topped hexagons in offset columns: every odd column sits half a tile lower than the even
+columns beside it. A tile's slot is its (column, row), with row 0 at the top. Since the layout never changes, which
+slots border which can be worked out once per board size.
+"""
+
+
+@cache
+def neighbor_table(num_columns: int, num_rows: int) -> tuple[tuple[tuple[tuple[int, int], ...], ...], ...]:
+    """
+    Returns the neighbor slots of every slot, indexed [column][row]. Besides the slots directly above and below, a
+    tile borders two slots in each neighboring column: rows {{ row }} and {{ row }} + 1 if its own column is one of
+    the lower (odd) ones, or rows {{ row }} - 1 and {{ row }} otherwise.
+    """
+    table = []
+    for column in range(num_columns):
+        side_rows = (0, 1) if column % 2 else (-1, 0)
+        rows = []
+        for row in range(num_rows):
+            slots = [(column, row - 1), (column, row + 1)]
+            for side_column in (column - 1, column + 1):
+                slots += [(side_column, row + offset) for offset in side_rows]
+            rows.append(tuple((c, r) for c, r in slots if 0 <= c < num_columns and 0 <= r < num_rows))
+        table.append(tuple(rows))
+
+    return tuple(table)
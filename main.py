@@ -1,11 +1,21 @@
+import argparse
+import math
+import os
+import random
+import sys
 from pathlib import Path
-from random import choice
 from typing import Optional
 
 import pygame
 
 from assets.colors import *
 from assets.fonts import get_fonts
+import dictionary
+from dictionary import TrieCursor
+from engine import GameState, get_word_from_tiles, is_valid_word_length
+from profiler import FrameProfiler, NullProfiler
+from renderer import DirtyRectRenderer
+from replay import Recorder, Replay
 from tile import Tile
 from tile_group import TileGroup
 from ui import Textfield, UIGroup, Button
@@ -15,112 +25,80 @@ from ui import Textfield, UIGroup, Button
 "Textagons" is an updated implementation of the classic PopCap game "Bookworm".
 
 FYI the longest word in the dictionary is "electroencephalographic", which has 23 letters.
-"R values" are a baseline for the rarity of letters in a bonus word, and have 22 "levels".
+"R values" are a baseline for the rarity of letters in a bonus word, and have 22 "levels" (see engine.R_VALUES).
 
-Each word in dictionary.txt, and therefore in WORDS_WITH_R_VALUES, is listed in lowercase along with its hardcoded
+Each word in dictionary.txt, and therefore in DICTIONARY, is listed in lowercase along with its hardcoded
 rarity; this keeps the game from choosing overly easy/common bonus words.
+
+The game rules live in engine.py; this module is the pygame front end, which draws a GameState and turns clicks into
+moves.
 """
 
 
 SCREEN_WIDTH = 525
 SCREEN_HEIGHT = 425
-BONUS_WORD = ''
-BONUS_WORD_LENGTH = 2
-SCORE = 0
-DICTIONARY = []
-HIGHEST_SCORING = {}
-LONGEST = ''
-WORDS_WITH_R_VALUES = []
-R_VALUES = [0, 0, 0, 0.16, 0.22, 0.28, 0.36, 0.42, 0.48, 0.55, 0.61, 0.68,
-            0.74, 0.8, 0.87, 0.93, 0.99, 1.07, 1.13, 1.28, 1.31, 1.38]
-
-
-def add_word_to_history(tiles: list[Tile], score: int, is_bonus: bool):
-    """
-    Updates longest and highest scoring words. Creates a dict for the latter, as we need to store point value and
-    individual letter colors too.
-    """
-    global LONGEST
-    global HIGHEST_SCORING
-
-    word = get_word_from_tiles(tiles)
-
-    if len(word) > len(LONGEST):
-        LONGEST = word
-
-    try:
-        new_high_score = score > HIGHEST_SCORING['value']
-    except KeyError:
-        new_high_score = True
-
-    if new_high_score:
-        colors = []
-        for tile in tiles:
-            if tile.type == 1:
-                colors.append(yellow if is_bonus else light_gray)
-            else:
-                colors.append(tile.text_color)
-
-        HIGHEST_SCORING = {
-            'letters': [t.letter.upper() for t in tiles],
-            'colors': colors,
-            'value': score
-        }
-
+STEPS_PER_SECOND = 60  # Simulation steps; tile falls and flashes are counted in steps
+FRAME_RATE = 60  # Drawn frames per second, at most
+MAX_STEPS_PER_FRAME = 5  # When the simulation falls further behind than this, it slows down instead of catching up
+DEFAULT_PROFILE_PATH = Path('frame_profile.json')
+DICTIONARY = dictionary.Dictionary([])
+BACKGROUNDS = {}
+
+
+def create_tiles(game: GameState, tile_size: int, fonts: list[pygame.font.Font]) -> TileGroup:
+    """ Lays out the board: odd columns sit half a tile lower than even ones, so neighboring hexagons interlock. """
+    tiles = TileGroup(game, tile_size)
+    for col, column in enumerate(game.board.columns):
+        y_offset = tile_size / 2 - 6 if col % 2 else -2
+        for row, state in enumerate(column):
+            coords = (col * tile_size - col * 13, row * tile_size - row * 8 + y_offset)
+            tiles.add(Tile(state=state, tile_size=tile_size, coords=coords, fonts=fonts))
 
-def check_word_against_dictionaty(word: str) -> bool:
-    return word.lower() in DICTIONARY
+    return tiles
 
 
-def choose_new_bonus_word(ui_group: UIGroup):
+def draw_background(screen: pygame.Surface, fire_tile_y: int):
     """
-    Chooses a new bonus word based on the length of the previous bonus word + 1. This choice takes the hardcoded
-    "R values" (rarity) into account, which makes sure the chosen word isn't too easy to find.
+    Fills the gameboard background with dark gray. If there is a fire tile at least halfway down the board,
+    draws some amount of red as well (see get_background()).
     """
-    global BONUS_WORD
-    global BONUS_WORD_LENGTH
+    if fire_tile_y >= 3:
+        screen.blit(get_background(screen.get_size(), fire_tile_y), (0, 0))
+    else:
+        screen.fill(dark_gray)
 
-    if BONUS_WORD_LENGTH < 12:
-        BONUS_WORD_LENGTH += 1
-    word_pool = [w[0] for w in WORDS_WITH_R_VALUES \
-                 if len(w[0]) == BONUS_WORD_LENGTH \
-                 and w[1] > R_VALUES[BONUS_WORD_LENGTH]]
-    BONUS_WORD = choice(word_pool).upper()
 
-    ui_group.bonus_word().set_text(BONUS_WORD, max_size=8, resize=True)
-    ui_group.bonus_word().flash(yellow)
+def get_fire_danger(tiles: TileGroup) -> int:
+    """ How far down the board (in tiles) the lowest fire tile is. Decides how much red draw_background() adds. """
+    return round(tiles.get_greatest_fire_tile_y() / tiles.tile_size)
 
 
-def draw_background(screen: pygame.Surface, tiles: TileGroup):
+def get_background(size: tuple[int], fire_tile_y: int) -> pygame.Surface:
     """
-    Fills the gameboard background with dark gray. If there is a fire tile at least halfway down the board,
-    draws some amount of red as well. This is my attempt at a linear gradient; we create a tiny gray Surface, draw
-    some red lines on it depending on how close the player is to losing, and then smoothscale it up to the size of the
-    screen.
+    This is my attempt at a linear gradient; we create a tiny gray Surface, draw some red lines on it depending on how
+    close the player is to losing, and then smoothscale it up to {{ size }}. There are only a few danger levels, so
+    each gradient is made once and kept in BACKGROUNDS.
     """
-    fire_tile_y = round(tiles.get_greatest_fire_tile_y() / tiles.sprites()[0].image.get_height())
-    if fire_tile_y >= 3:
-        tiny_rect = pygame.Surface((2, 4))
-        tiny_rect.fill(dark_gray)
+    try:
+        return BACKGROUNDS[(size, fire_tile_y)]
+    except KeyError:
+        pass
 
-        col = fire_tile_y - 2
-        while col:
-            faded_red = dark_gray.lerp(dark_red, (fire_tile_y - 2) / 6)
-            pygame.draw.line(tiny_rect, faded_red, (0, 4 - col), (1, 4 - col))
-            col -= 1
+    tiny_rect = pygame.Surface((2, 4))
+    tiny_rect.fill(dark_gray)
 
-        screen.blit(pygame.transform.smoothscale(tiny_rect, screen.get_size()), (0, 0))
-    else:
-        screen.fill(dark_gray)
+    col = fire_tile_y - 2
+    while col:
+        faded_red = dark_gray.lerp(dark_red, (fire_tile_y - 2) / 6)
+        pygame.draw.line(tiny_rect, faded_red, (0, 4 - col), (1, 4 - col))
+        col -= 1
 
+    BACKGROUNDS[(size, fire_tile_y)] = pygame.transform.smoothscale(tiny_rect, size)
 
-def get_word_from_tiles(tiles: list[Tile]) -> str:
-    return ''.join([t.letter for t in tiles]).upper()
+    return BACKGROUNDS[(size, fire_tile_y)]
 
 
-def get_clicked_menu_button(group: UIGroup) -> Optional[Button]:
-    mouse_pos = pygame.mouse.get_pos()
-
+def get_clicked_menu_button(group: UIGroup, mouse_pos: tuple[int, int]) -> Optional[Button]:
     if group.restart_menu():
         buttons_iter = iter(group.restart_menu().buttons())
     elif group.history():
@@ -137,9 +115,7 @@ def get_clicked_menu_button(group: UIGroup) -> Optional[Button]:
             return None
 
 
-def get_clicked_sprite(group: pygame.sprite.Group) -> Optional[pygame.sprite.Sprite]:
-    mouse_pos = pygame.mouse.get_pos()
-
+def get_clicked_sprite(group: pygame.sprite.Group, mouse_pos: tuple[int, int]) -> Optional[pygame.sprite.Sprite]:
     sprites_iter = iter(group)
     while True:
         try:
@@ -150,223 +126,398 @@ def get_clicked_sprite(group: pygame.sprite.Group) -> Optional[pygame.sprite.Spr
             return None
 
 
-def handle_left_mouse_down(ui_group: UIGroup, tiles: TileGroup, selected: list[Tile]) -> Textfield | Tile | None:
+def get_highest_scoring(game: GameState) -> dict:
+    """
+    The highest scoring word as the history menus show it: each letter colored like the tile it was on, with normal
+    tiles in yellow if the word was the bonus word.
+    """
+    if game.highest_scoring is None:
+        return {}
+
+    colors = []
+    for tile_type in game.highest_scoring['types']:
+        match tile_type:
+            case 0:
+                colors.append(red)
+            case 1:
+                colors.append(yellow if game.highest_scoring['is_bonus'] else light_gray)
+            case 2:
+                colors.append(teal)
+
+    return {
+        'letters': game.highest_scoring['letters'],
+        'colors': colors,
+        'value': game.highest_scoring['value']
+    }
+
+
+def handle_left_mouse_down(ui_group: UIGroup, tiles: TileGroup, selected: list[Tile],
+                           mouse_pos: tuple[int, int]) -> Textfield | Tile | None:
     """ Returns the object the player clicked on, if any. Checks UI buttons first, then all other sprites. """
-    button = get_clicked_sprite(ui_group)
+    button = get_clicked_sprite(ui_group, mouse_pos)
     if button:
         return button
 
-    return get_clicked_sprite(tiles)
+    return tiles.get_tile_at(mouse_pos)
 
 
-def is_valid_word_length(selected_tiles:list[Tile]) -> bool:
+def load_dictionary():
     """
-    To submit a word, it must contain at least 3 letters, which could be on 2 or 3 tiles, depending on if the player
-    selected a "Qu" tile.
+    Loads "assets/dictionary.txt" into the global DICTIONARY var. Goes through a binary cache of the parsed file
+    ("assets/dictionary.cache"), which is rebuilt automatically whenever the text file changes.
     """
-    if len(selected_tiles) > 2:
-        return True
-
-    if len(selected_tiles) == 2 and 'Qu' in [l.letter for l in selected_tiles]:
-        return True
-
-    return False
-
-
-def load_dictionary():
-    """ Loads "assets/dictionary.txt" into the global DICTIONARY and WORDS_WITH_R_VALUES vars. """
     global DICTIONARY
-    global WORDS_WITH_R_VALUES
-
-    with open(Path(__file__).parent / 'assets' / 'dictionary.txt') as file:
-        for line in file.read().split('\n'):
-            entry = line.split(',')
-            DICTIONARY.append(entry[0])
-            WORDS_WITH_R_VALUES.append([entry[0], float(entry[1])])
-
-
-def restart_game(tiles: TileGroup, ui_group: UIGroup):
-    global BONUS_WORD
-    global BONUS_WORD_LENGTH
-    global HIGHEST_SCORING
-    global LONGEST
-    global SCORE
-
-    SCORE = 0
-    BONUS_WORD = ''
-    BONUS_WORD_LENGTH = 2  # choose_new_bonus_word ticks this up by 1, so we
-    HIGHEST_SCORING = {}   # start at 2 to begin the game with a 3-letter word.
-    LONGEST = ''
-    choose_new_bonus_word(ui_group)
-    ui_group.score().set_text(0)
 
-    tiles.deselect()
-    tiles.scramble()
-    tiles.set_type(1)
+    DICTIONARY = dictionary.load(Path(__file__).parent / 'assets' / 'dictionary.txt')
 
 
-def score_tiles(tiles: list[Tile], bonus_mult: int) -> int:
-    return sum([t.value for t in tiles]) * len(tiles) * bonus_mult
+def restart_game(game: GameState, tiles: TileGroup, ui_group: UIGroup):
+    game.reset()
+    tiles.bump()
+    show_bonus_word(game, ui_group)
+    ui_group.score().set_text(0)
 
 
-def process_selected_tiles(clicked_tile: Tile, tiles: TileGroup, selected: list[Tile],
-                           ui_group: UIGroup) -> list[Tile]:
+def process_selected_tiles(clicked_tile: Tile, game: GameState, tiles: TileGroup, selected: list[Tile],
+                           ui_group: UIGroup, cursor: TrieCursor) -> list[Tile]:
     """
-    A lot of the game logic lives here. This function selects/deselects tiles, decides when the player has chosen to
-    submit a word, and fires off trigger events for removing tiles, choosing new bonus words, updating the score, and
-    adding entries to the player's word history.
+    Selects/deselects tiles and decides when the player has chosen to submit a word. Submitted words go to
+    {{ game }}, which scores them and removes their tiles; this function then shows the results. {{ cursor }} is
+    moved along with the selection.
     """
-    global SCORE
-
     if selected:
         if clicked_tile == selected[-1]:
             if is_valid_word_length(selected):
-                word = get_word_from_tiles(selected)
-                if check_word_against_dictionaty(word):
-                    bonus_mult = 1
-                    if word == BONUS_WORD:
-                        bonus_mult = 3
-                        choose_new_bonus_word(ui_group)
+                submission = game.submit([t.state for t in selected])
+                if submission:
+                    if submission.is_bonus:
+                        show_bonus_word(game, ui_group)
 
-                    delta = score_tiles(selected, bonus_mult)
-                    SCORE += delta
-
-                    ui_group.show_score_delta(delta=str(delta))
-
-                    add_word_to_history(tiles=selected, score=delta, is_bonus=bonus_mult == 3)
-
-                    tiles.remove_selected(word_length=len(word), is_bonus=bonus_mult == 3)
+                    ui_group.show_score_delta(delta=str(submission.score))
 
+                    cursor.clear()
                     return []
                 else:
                     tiles.deselect()
 
                     ui_group.current_word().flash_and_clear(red)
 
+                    cursor.clear()
                     return []
             elif len(selected) == 1:
                 clicked_tile.deselect()
+                cursor.clear()
                 return []
         if clicked_tile.selected:
             index = selected.index(clicked_tile)
             for tile in selected[index + 1:]:
                 tile.deselect()
+            cursor.truncate(index + 1)
             return selected[:index + 1]
         if clicked_tile in tiles.get_neighbors(selected[-1]):
             clicked_tile.select()
             selected.append(clicked_tile)
+            cursor.push(clicked_tile.letter)
             return selected
         else:
             tiles.deselect()
 
             clicked_tile.select()
+            cursor.clear()
+            cursor.push(clicked_tile.letter)
             return [clicked_tile]
     else:
         clicked_tile.select()
+        cursor.push(clicked_tile.letter)
         return [clicked_tile]
 
 
-def main():
-    screen_dims = (SCREEN_WIDTH, SCREEN_HEIGHT)
-    screen = pygame.display.set_mode(screen_dims)
+def show_bonus_word(game: GameState, ui_group: UIGroup):
+    ui_group.bonus_word().set_text(game.bonus_word, max_size=8, resize=True)
+    ui_group.bonus_word().flash(yellow)
+
+
+def show_current_word(ui_group: UIGroup, selected: list[Tile], cursor: TrieCursor):
+    """
+    Shows the selected word in green if it can be submitted, and dimmed once no word starts with it. {{ cursor }}
+    already knows which, so this never searches the dictionary.
+    """
+    if cursor.is_word() and is_valid_word_length(selected):
+        color = green
+    elif cursor.is_prefix():
+        color = light_gray
+    else:
+        color = mid_gray
+
+    ui_group.current_word().set_color(color)
+    ui_group.current_word().set_text(get_word_from_tiles(selected), max_size=8)
+
+
+class Session:
+    """
+    One game as the front end plays it, minus the drawing: the GameState, its tiles and UI, and the player's selection
+    (and the selection's place in the dictionary's trie, {{ self.cursor }}).
+    step() advances it by one fixed simulation step, handling that step's clicks, so the game plays out the same
+    however often it's drawn, and can be stepped headlessly (see play_headless()).
+    """
+
+    def __init__(self, game: GameState, fonts: list[pygame.font.Font], tile_size: int = 64):
+        self.game = game
+        self.fonts = fonts
+        self.game_over = False
+        self.menu_open = False
+        self.selected_tiles = []
+        self.cursor = game.dictionary.cursor()
+        self.steps = 0
+
+        self.ui_group = UIGroup(fonts, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        show_bonus_word(game, self.ui_group)
+
+        self.tiles = create_tiles(game, tile_size, fonts)
+        self.tiles.bump()
+
+    def handle_click(self, button: int, mouse_pos: tuple[int, int], tiles_ready: bool):
+        game, tiles, ui_group = self.game, self.tiles, self.ui_group
+
+        if self.menu_open:
+            menu_button = get_clicked_menu_button(ui_group, mouse_pos)
+            if menu_button:
+                if menu_button.label == 'restart_yes':
+                    self.selected_tiles = []
+                    self.cursor.clear()
+                    show_current_word(ui_group, self.selected_tiles, self.cursor)
+                    restart_game(game, tiles, ui_group)
+                ui_group.hide_menus()
+                self.menu_open = False
+        else:
+            if button == 3 and tiles_ready:  # <- Right click
+                tile = tiles.get_tile_at(mouse_pos)
+                if tile:
+                    tile.toggle_mark()
+
+            elif button == 1:                # <- Left click
+                clicked_sprite = handle_left_mouse_down(ui_group, tiles, self.selected_tiles, mouse_pos)
+
+                if type(clicked_sprite) == Tile and tiles_ready:
+                    ui_group.current_word().kill_flash()
+
+                    self.selected_tiles = process_selected_tiles(clicked_sprite, game, tiles, self.selected_tiles,
+                                                                 ui_group, self.cursor)
+                    show_current_word(ui_group, self.selected_tiles, self.cursor)
+                    ui_group.score().set_text(game.score)
+
+                elif type(clicked_sprite) == Textfield:
+                    if clicked_sprite.label == 'btn_history':
+                        ui_group.show_history(game.longest, get_highest_scoring(game), self.fonts)
+                        self.menu_open = True
+
+                    elif clicked_sprite.label == 'btn_scramble' \
+                        and tiles_ready:
+                        game.scramble()
+                        tiles.bump()
+                        self.selected_tiles = []
+                        self.cursor.clear()
+                        show_current_word(ui_group, self.selected_tiles, self.cursor)
+
+                    elif clicked_sprite.label == 'btn_unmark':
+                        tiles.unmark()
+                        tiles.deselect()
+                        self.selected_tiles = []
+                        self.cursor.clear()
+                        show_current_word(ui_group, self.selected_tiles, self.cursor)
+
+                    elif clicked_sprite.label == 'btn_restart':
+                        self.menu_open = True
+                        ui_group.show_restart_menu(self.fonts)
+
+    def step(self, clicks: list[tuple[int, tuple[int, int]]]):
+        """ Handles {{ clicks }} (mouse button, position), then moves the tiles and the UI on by one step. """
+        tiles_ready = self.tiles.is_all_at_target()  # Check if tiles have finished their failling animation
+        # The game stays over until it's restarted, so this also brings the menu back after hide_menus() (e.g. closing
+        # the history menu) has taken it away
+        if self.game.game_over and not self.ui_group.game_over_menu():
+            self.menu_open = True
+            self.ui_group.show_game_over_menu(self.game.longest, get_highest_scoring(self.game), self.fonts)
+
+        for button, mouse_pos in clicks:
+            self.handle_click(button, mouse_pos, tiles_ready)
+
+        self.game_over = self.tiles.step()  # <- Checks for fire tiles on the bottom row
+        self.ui_group.update()
+        self.steps += 1
+
+
+def main(record_path: Optional[Path] = None, replay: Optional[Replay] = None, speed: float = 1,
+         profile_path: Optional[Path] = None):
+    """
+    Runs the game. With {{ record_path }}, the session is recorded there as a replay (see replay.py). With
+    {{ replay }}, the recorded clicks are played back instead of the player's, {{ speed }} times as fast (0 for as
+    fast as possible). With {{ profile_path }}, each phase of every frame is timed, a summary is shown on screen, and
+    the timings are written to {{ profile_path }} on exit (see profiler.py).
+
+    The game is simulated in fixed steps of 1 / STEPS_PER_SECOND seconds, however fast frames are drawn. Each frame
+    runs as many steps as the time since the last frame calls for, and draws the tiles partway between their last two
+    steps, by however much time is left over. A host that can't keep up draws fewer frames, each running several
+    steps, so the game keeps its speed. That only goes up to MAX_STEPS_PER_FRAME steps a frame; past that, the rest
+    of the backlog is dropped and the game slows down, rather than each frame falling further behind.
+    """
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = DirtyRectRenderer(screen)
     clock = pygame.time.Clock()
     running = True
-    menu_open = False
-    tiles_ready = True
-    game_over = False
-    tile_size = 64
-    num_columns = 7
-    num_rows = 7
-    selected_tiles = []
+    num_columns = 7 if replay is None else replay.num_columns
+    num_rows = 7 if replay is None else replay.num_rows
+    seed = random.randrange(2 ** 32) if replay is None else replay.seed
+    fire_danger = None
     fonts = get_fonts()
     load_dictionary()
 
-    ui_group = UIGroup(fonts)
-    choose_new_bonus_word(ui_group)
+    game = GameState(DICTIONARY, num_columns, num_rows, seed)
+    recorder = Recorder(record_path, game) if record_path else None
+    session = Session(game, fonts)
+    tiles, ui_group = session.tiles, session.ui_group
 
-    tiles = TileGroup(num_columns)
-    for col in range(num_columns):
-        y_offset = tile_size / 2 - 6 if col % 2 else -2
-        for row in range(num_rows):
-            coords = (col * tile_size - col * 13, row * tile_size - row * 8 + y_offset)
-            tiles.add(Tile(tile_size=tile_size, coords=coords, column=col, fonts=fonts))
+    profiler = FrameProfiler(profile_path, fonts['mini'], SCREEN_HEIGHT) if profile_path else NullProfiler()
+    profiler.wrap(tiles, 'update_tile_targets', 'update_tile_targets')
+    profiler.wrap(ui_group, 'update', 'UIGroup.update')  # Runs once a step, inside the 'simulation' phase
+    overlays = [profiler.overlay] if profiler.overlay else []
 
-    tiles.scramble()   # For "bump" animation
-    tiles.set_type(1)  # Clear any fire tiles created by scrambling
+    step_time = 1 / STEPS_PER_SECOND
+    max_steps = MAX_STEPS_PER_FRAME * max(1, math.ceil(speed))
+    accumulator = 0.0  # Time the simulation is behind by
+    clicks = []  # Waiting for the next step
 
     while running:
-        clock.tick(60)
-        tiles_ready = tiles.is_all_at_target()  # Check if tiles have finished their failling animation
-        if game_over:
-            menu_open = True
-            ui_group.show_game_over_menu(LONGEST, HIGHEST_SCORING, fonts)
+        elapsed = clock.tick(FRAME_RATE if speed else 0) / 1000
+        profiler.start_frame()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and not replay:  # Replays bring their own clicks
+                clicks.append((event.button, event.pos))
+        profiler.lap('events')
 
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if menu_open:
-                    button = get_clicked_menu_button(ui_group)
-                    if button:
-                        if button.label == 'restart_yes':
-                            selected_tiles = []
-                            restart_game(tiles, ui_group)
-                        ui_group.hide_menus()
-                        menu_open = False
-                else:
-                    if event.button == 3 and tiles_ready:  # <- Right click
-                        tile = get_clicked_sprite(tiles)
-                        if tile:
-                            tile.toggle_mark()
+        accumulator += elapsed * speed if speed else step_time  # As fast as possible: a step every frame
+        steps = 0
+        while accumulator >= step_time and steps < max_steps:
+            step = session.steps
+            if replay:
+                clicks = replay.clicks_at(step)
+
+            session.step(clicks)
+            if recorder:
+                recorder.record_frame(step, clicks)
+
+            clicks = []
+            accumulator -= step_time
+            steps += 1
+
+        if steps == max_steps:
+            accumulator = min(accumulator, step_time)  # Drop the backlog: the game slows down from here
+        profiler.lap('simulation')
+
+        if get_fire_danger(tiles) != fire_danger:
+            fire_danger = get_fire_danger(tiles)  # Only looks at fire tiles, so this is cheap to check every frame
+            draw_background(renderer.background, fire_danger)
+            renderer.redraw_all()
+        profiler.lap('draw_background')
+
+        tiles.update(accumulator / step_time)
+        profiler.lap('TileGroup.update')
+
+        # Only the areas where something moved or changed get redrawn and pushed to the display
+        dirty_rects = renderer.draw([*tiles, *ui_group, *overlays])
+        profiler.lap('draw sprites')
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        profiler.lap('display.update')
 
-                    elif event.button == 1:                # <- Left click
-                        clicked_sprite = handle_left_mouse_down(ui_group, tiles, selected_tiles)
+        profiler.end_frame()
 
-                        if type(clicked_sprite) == Tile and tiles_ready:
-                            ui_group.current_word().kill_flash()
+    if recorder:
+        recorder.close()
+    profiler.dump()
 
-                            selected_tiles = process_selected_tiles(clicked_sprite, tiles, selected_tiles, ui_group)
-                            ui_group.current_word().set_text(get_word_from_tiles(selected_tiles), max_size=8)
-                            ui_group.score().set_text(SCORE)
 
-                        elif type(clicked_sprite) == Textfield:
-                            if clicked_sprite.label == 'btn_history':
-                                ui_group.show_history(LONGEST, HIGHEST_SCORING, fonts)
-                                menu_open = True
+def parse_profile_setting(value: str) -> Optional[Path]:
+    """
+    Reads the TEXTAGONS_PROFILE environment variable: "1", "true", "yes" or "on" profile to {{ DEFAULT_PROFILE_PATH }},
+    "", "0", "false", "no" or "off" don't profile, and anything that looks like a file path (it has a suffix or a
+    directory) profiles to that file. Raises ValueError for anything else.
+    """
+    setting = value.strip().lower()
+    if setting in ('', '0', 'false', 'no', 'off'):
+        return None
+    if setting in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_PROFILE_PATH
 
-                            elif clicked_sprite.label == 'btn_scramble' \
-                                and tiles_ready:
-                                ui_group.current_word().clear()
-                                tiles.scramble()
-                                selected_tiles = []
+    path = Path(value.strip())
+    if path.suffix or path.name != value.strip():
+        return path
 
-                            elif clicked_sprite.label == 'btn_unmark':
-                                ui_group.current_word().clear()
-                                tiles.unmark()
-                                tiles.deselect()
-                                selected_tiles = []
+    raise ValueError(f'TEXTAGONS_PROFILE should be 1 or 0, or a file path like "{DEFAULT_PROFILE_PATH}", not {value!r}')
 
-                            elif clicked_sprite.label == 'btn_restart':
-                                menu_open = True
-                                ui_group.show_restart_menu(fonts)
 
-        draw_background(screen, tiles)
+def play_headless(replay: Replay) -> tuple[Session, list[str]]:
+    """
+    Steps a Session through {{ replay }}'s clicks without drawing anything, until its last recorded event. Returns the
+    session and any moves that didn't turn out as recorded, which is checked more strictly than replay.play(): the
+    moves have to happen on the same steps, with the tiles animating exactly as they did when it was recorded.
+    """
+    pygame.font.init()
+    load_dictionary()
 
-        game_over = tiles.update()  # <- Checks for fire tiles on the bottom row
+    game = replay.new_game(DICTIONARY)
+    game.log = []
+    session = Session(game, get_fonts())
+    recorded = [event for event in replay.events if event['type'] != 'click']
+    played = []
+    last_step = replay.events[-1]['frame'] if replay.events else 0
 
-        for tile in tiles:
-            screen.blit(tile.image, (tile.rect.x, tile.rect.y))
+    while session.steps <= last_step:
+        step = session.steps
+        session.step(replay.clicks_at(step))
+        played += [{'frame': step, **event} for event in game.log]
+        game.log.clear()
 
-        ui_group.update()
-        for element in ui_group:
-            screen.blit(element.image, (element.rect.x, element.rect.y))
+    mismatches = [f"step {event['frame']}: {event} was recorded, got {actual}"
+                  for event, actual in zip(recorded, played) if event != actual]
+    if len(played) != len(recorded):
+        mismatches.append(f'{len(recorded)} moves were recorded, got {len(played)}')
 
-        pygame.display.flip()
+    return session, mismatches
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Textagons')
+    parser.add_argument('--record', type=Path, metavar='FILE', help='record this session as a replay')
+    parser.add_argument('--replay', type=Path, metavar='FILE', help='watch a recorded replay')
+    parser.add_argument('--speed', type=float, default=1, help='replay speed multiplier; 0 is as fast as possible')
+    parser.add_argument('--headless', action='store_true',
+                        help='step through the --replay without drawing it, and check it plays out as recorded')
+    parser.add_argument('--profile', type=Path, nargs='?', const=DEFAULT_PROFILE_PATH, metavar='FILE',
+                        help=f'time each phase of every frame and write the timings to FILE ({DEFAULT_PROFILE_PATH})')
+    args = parser.parse_args()
+
+    # TEXTAGONS_PROFILE=1 (or =FILE) does the same as --profile
+    try:
+        profile_path = args.profile or parse_profile_setting(os.environ.get('TEXTAGONS_PROFILE', ''))
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.headless:
+        if not args.replay:
+            parser.error('--headless needs a --replay')
+
+        session, mismatches = play_headless(Replay.load(args.replay))
+        status = 'game over' if session.game.game_over else 'in progress'
+        print(f'{args.replay}: {session.steps} steps, {session.game.score} points, {status}')
+        for mismatch in mismatches:
+            print(f'  {mismatch}')
+        sys.exit(1 if mismatches else 0)
+
     pygame.init()
     pygame.display.set_caption('Textagons')
 
-    main()
+    main(args.record, Replay.load(args.replay) if args.replay else None, args.speed, profile_path)
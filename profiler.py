@@ -0,0 +1,181 @@
+import json
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from time import perf_counter
+
+import pygame
+
+from assets.colors import *
+
+
+"""
+Opt-in timing of the main loop, turned on with --profile or the TEXTAGONS_PROFILE environment variable (see main.py).
+
+The loop calls lap() after each of its phases; each lap is the time since the previous one. Nested work (like
+TileGroup.update_tile_targets() inside TileGroup.step()) is timed by wrapping the method with wrap(), and is also
+counted in its parent's phase. Every phase keeps a histogram with fixed, logarithmic buckets, so memory stays constant
+however long the game runs, and the last {{ FrameProfiler.window }} frame times back an on-screen FPS/percentile
+overlay. On exit, dump() writes each phase's summary and histogram to a JSON file.
+
+When profiling is off the loop gets a NullProfiler, whose methods do nothing.
+"""
+
+
+BUCKET_EDGES = [10 ** (exponent / 10) for exponent in range(-60, 1)]  # Seconds: 1us to 1s, 10 buckets per decade
+
+
+class PhaseTimes:
+    """ A histogram of one phase's times over {{ BUCKET_EDGES }}, plus the exact count, total and maximum. """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES) + 1)  # The last bucket holds anything over 1s
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_right(BUCKET_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        The upper edge of the bucket holding the {{ fraction }} quantile, capped at the largest time recorded. The
+        bucket's edges are 26% apart, so that's never below the true quantile, and at most 26% above the bucket's lower
+        edge.
+        """
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKET_EDGES[index], self.max) if index < len(BUCKET_EDGES) else self.max
+
+        return 0.0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+            'histogram': [{'up_to_ms': BUCKET_EDGES[i] * 1000 if i < len(BUCKET_EDGES) else None, 'count': count}
+                          for i, count in enumerate(self.counts) if count],
+        }
+
+
+class ProfilerOverlay(pygame.sprite.Sprite):
+    """ A line of text in the bottom left corner with the recent FPS and frame time percentiles. """
+
+    def __init__(self, font: pygame.font.Font, screen_height: int):
+        super().__init__()
+
+        self.font = font
+        self.screen_height = screen_height
+        self.set_text('profiling...')
+
+    def set_text(self, text: str):
+        self.image = self.font.render(text, True, yellow, dark_gray)
+        self.rect = self.image.get_rect(bottomleft=(2, self.screen_height - 2))
+
+
+class FrameProfiler:
+    """
+    Collects per-phase frame timings. Call start_frame() at the top of the loop, lap(name) after each phase, and
+    end_frame() at the bottom. {{ self.overlay }} is a sprite to draw over everything else; it's refreshed every
+    {{ overlay_interval }} frames.
+    """
+
+    window = 120
+    overlay_interval = 30
+
+    def __init__(self, output_path: Path, font: pygame.font.Font, screen_height: int):
+        self.output_path = output_path
+        self.overlay = ProfilerOverlay(font, screen_height)
+        self.phases = {}  # Name -> PhaseTimes, in the order phases first ran
+        self.recent_frames = deque(maxlen=self.window)  # Frame times, without waiting on the clock
+        self.recent_starts = deque(maxlen=self.window)  # When those frames started, for the actual FPS
+        self.frame_start = self.last_lap = perf_counter()
+        self.frames = 0
+
+    def add(self, name: str, seconds: float):
+        try:
+            self.phases[name].add(seconds)
+        except KeyError:
+            self.phases[name] = PhaseTimes()
+            self.phases[name].add(seconds)
+
+    def dump(self):
+        """ Writes every phase's summary and histogram to {{ self.output_path }}, and prints the summaries. """
+        report = {name: times.summary() for name, times in self.phases.items()}
+        self.output_path.write_text(json.dumps(report, indent=2))
+
+        print(f'Frame profile ({self.frames} frames) written to {self.output_path}')
+        for name, summary in report.items():
+            print(f"  {name:<24} mean {summary['mean_ms']:7.3f} ms   p50 {summary['p50_ms']:7.3f}   "
+                  f"p95 {summary['p95_ms']:7.3f}   p99 {summary['p99_ms']:7.3f}   max {summary['max_ms']:7.3f}")
+
+    def end_frame(self):
+        now = perf_counter()
+        self.add('frame', now - self.frame_start)
+        self.recent_frames.append(now - self.frame_start)
+        self.frames += 1
+
+        if self.frames % self.overlay_interval == 0:
+            self.update_overlay()
+
+    def lap(self, name: str):
+        now = perf_counter()
+        self.add(name, now - self.last_lap)
+        self.last_lap = now
+
+    def start_frame(self):
+        """ The time between end_frame() and here is mostly clock.tick() waiting, so it's left out. """
+        self.frame_start = self.last_lap = perf_counter()
+        self.recent_starts.append(self.frame_start)
+
+    def update_overlay(self):
+        recent = sorted(self.recent_frames)
+        fps = (len(self.recent_starts) - 1) / (self.recent_starts[-1] - self.recent_starts[0])
+        p50 = recent[len(recent) // 2] * 1000
+        p95 = recent[int(len(recent) * 0.95)] * 1000
+        peak = recent[-1] * 1000
+        self.overlay.set_text(f'{fps:.0f} fps   frame p50 {p50:.2f} ms   p95 {p95:.2f} ms   max {peak:.2f} ms')
+
+    def wrap(self, obj: object, method_name: str, phase: str):
+        """ Times every call to {{ obj }}'s {{ method_name }} as {{ phase }}, by shadowing it on the instance. """
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            self.add(phase, perf_counter() - start)
+            return result
+
+        setattr(obj, method_name, timed)
+
+
+class NullProfiler:
+    """ Stands in for FrameProfiler when profiling is off. """
+
+    overlay = None
+
+    def dump(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def lap(self, name: str):
+        pass
+
+    def start_frame(self):
+        pass
+
+    def wrap(self, obj: object, method_name: str, phase: str):
+        pass
+
@@ -0,0 +1,64 @@
+from typing import Iterable
+
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Draws only the parts of the screen that changed since the previous frame.
+    A sprite counts as changed when its {{ image }} is a different Surface than last frame, or its {{ rect }} moved;
+    sprites whose Surfaces are rebuilt only when their content changes (like tiles) are therefore free to skip while
+    they sit still. For each changed area, the background is restored and every sprite overlapping it is redrawn in
+    order, clipped to that area. Sprites that disappeared (e.g. a closed menu) leave their last area behind as dirty.
+    Sprites are drawn at their {{ draw_rect }} if they have one (tiles, which keep {{ rect }} for the simulation; see
+    Tile.update()), and at their {{ rect }} otherwise.
+    """
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size())
+        self.drawn = {}  # Sprite -> (image, rect) as of the last frame
+        self.full_redraw = True
+
+    def draw(self, sprites: Iterable[pygame.sprite.Sprite]) -> list[pygame.Rect]:
+        """
+        Brings the screen up to date with {{ sprites }}, which are drawn in the order given. Returns the areas that
+        were redrawn, ready to be passed to pygame.display.update(); an empty list means nothing needs to be pushed.
+        """
+        sprites = list(sprites)
+        rects = [getattr(sprite, 'draw_rect', sprite.rect) for sprite in sprites]
+
+        if self.full_redraw:
+            dirty = [self.screen.get_rect()]
+            self.full_redraw = False
+        else:
+            dirty = []
+            for sprite, rect in zip(sprites, rects):
+                previous = self.drawn.pop(sprite, None)
+                if previous is None:
+                    dirty.append(rect.copy())
+                elif previous[0] is not sprite.image or previous[1] != rect:
+                    dirty.append(previous[1])
+                    dirty.append(rect.copy())
+
+            dirty += [rect for _, rect in self.drawn.values()]  # Anything left over is no longer drawn
+
+        self.drawn = {sprite: (sprite.image, rect.copy()) for sprite, rect in zip(sprites, rects)}
+
+        screen_rect = self.screen.get_rect()
+        dirty = [area.clip(screen_rect) for area in dirty]
+        dirty = [area for area in dirty if area.w and area.h]  # Tiles waiting above the board are off screen
+
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.blit(self.background, area, area)
+            for sprite, rect in zip(sprites, rects):
+                if rect.colliderect(area):
+                    self.screen.blit(sprite.image, rect)
+        self.screen.set_clip(None)
+
+        return dirty
+
+    def redraw_all(self):
+        """ Redraws the whole screen next frame, e.g. after {{ self.background }} changes. """
+        self.full_redraw = True
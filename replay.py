@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import dictionary
+from dictionary import Dictionary
+from engine import GameState
+
+
+"""
+Recording games and playing them back. A replay is a text file of JSON objects, one per line. The first line is a
+header with the format version, the game's seed and the board size; every line after it is an event stamped with the
+simulation step it happened on (see main.Session; the key is "frame" because recordings used to count drawn frames,
+which ran one step each):
+
+    {"version": 1, "seed": 1234, "columns": 7, "rows": 7}
+    {"frame": 212, "type": "click", "button": 1, "pos": [180, 95]}
+    {"frame": 240, "type": "submit", "path": [[2, 1], [2, 2], [3, 2]], "word": "CAT", "score": 15}
+    {"frame": 251, "type": "burn", "tiles": [[4, 0]]}
+    {"frame": 300, "type": "scramble"}
+
+Clicks are what the player did, and are enough to replay a session through the pygame front end (python main.py
+--replay FILE) at any speed. The other events come from GameState.log, and are enough to replay the game headlessly
+(python replay.py FILE...), which is fast enough to check a large set of recorded games after a rules change. Burns
+are recorded along with the fire tiles that burned, because the front end only lets a fire tile burn once it has
+finished falling (see TileGroup.step()); the headless playback lets exactly those tiles burn, at the same point
+between moves.
+"""
+
+
+FORMAT_VERSION = 1
+
+
+class Replay:
+
+    def __init__(self, header: dict, events: list[dict]):
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported replay version: {header.get('version')}")
+
+        self.seed = header['seed']
+        self.num_columns = header['columns']
+        self.num_rows = header['rows']
+        self.events = events
+        self.clicks = {}  # Frame -> [(button, pos)]
+
+        for event in events:
+            if event['type'] == 'click':
+                self.clicks.setdefault(event['frame'], []).append((event['button'], tuple(event['pos'])))
+
+    @classmethod
+    def load(cls, path: Path) -> 'Replay':
+        with open(path) as file:
+            lines = [json.loads(line) for line in file if line.strip()]
+
+        return cls(lines[0], lines[1:])
+
+    def clicks_at(self, frame: int) -> list[tuple[int, tuple[int, int]]]:
+        return self.clicks.get(frame, [])
+
+    def new_game(self, words: Dictionary) -> GameState:
+        return GameState(words, self.num_columns, self.num_rows, self.seed)
+
+
+class Recorder:
+    """
+    Writes a replay of {{ game }} to {{ path }} as it's played. Call record_frame() once per frame with that frame's
+    clicks; the game's own moves are picked up from {{ game.log }}.
+    """
+
+    def __init__(self, path: Path, game: GameState):
+        self.file = open(path, 'w')
+        self.game = game
+        self.game.log = []
+
+        self.write({'version': FORMAT_VERSION, 'seed': game.seed, 'columns': game.board.num_columns,
+                    'rows': game.board.num_rows})
+
+    def close(self):
+        self.file.close()
+
+    def record_frame(self, frame: int, clicks: list[tuple[int, tuple[int, int]]]):
+        for button, pos in clicks:
+            self.write({'frame': frame, 'type': 'click', 'button': button, 'pos': list(pos)})
+
+        for event in self.game.log:
+            self.write({'frame': frame, **event})
+        self.game.log.clear()
+
+    def write(self, event: dict):
+        self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+
+class PlaybackResult(NamedTuple):
+    game: GameState
+    mismatches: list[str]
+
+
+def play(replay: Replay, words: Dictionary) -> PlaybackResult:
+    """
+    Replays {{ replay }}'s moves and burns on a headless GameState. Anything that doesn't turn out as recorded (a
+    word scoring differently, a game over on a different burn) is listed in the result's mismatches.
+    """
+    game = replay.new_game(words)
+    mismatches = []
+
+    for event in replay.events:
+        frame = event['frame']
+
+        match event['type']:
+            case 'submit':
+                submission = game.submit([game.board.tile_at(column, row) for column, row in event['path']])
+                if submission is None:
+                    mismatches.append(f"frame {frame}: {event['word']} was not accepted")
+                elif (submission.word, submission.score) != (event['word'], event['score']):
+                    mismatches.append(f"frame {frame}: played {submission.word} for {submission.score}, recorded "
+                                      f"{event['word']} for {event['score']}")
+
+            case 'scramble':
+                game.scramble()
+
+            case 'restart':
+                game.reset()
+
+            case 'burn':
+                burned = {tuple(slot) for slot in event['tiles']}
+                game_over = game.tick(settled=lambda tile: (tile.column, tile.row) in burned)
+                if game_over != event.get('game_over', False):
+                    mismatches.append(f'frame {frame}: game over was {game_over}, recorded the opposite')
+                elif game_over and game.score != event['score']:
+                    mismatches.append(f"frame {frame}: game over at {game.score} points, recorded {event['score']}")
+
+    return PlaybackResult(game, mismatches)
+
+
+def main(paths: list[Path], dictionary_path: Optional[Path] = None) -> bool:
+    """ Plays back every replay in {{ paths }} headlessly and reports on each. Returns True if all matched. """
+    dictionary_path = dictionary_path or Path(__file__).parent / 'assets' / 'dictionary.txt'
+    words = dictionary.load(dictionary_path)
+    all_matched = True
+
+    for path in paths:
+        game, mismatches = play(Replay.load(path), words)
+        status = 'game over' if game.game_over else 'in progress'
+        print(f'{path}: {game.score} points, {len(game.history)} words, {status}')
+        for mismatch in mismatches:
+            print(f'  {mismatch}')
+        all_matched = all_matched and not mismatches
+
+    return all_matched
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play back recorded games headlessly and check they still match.')
+    parser.add_argument('replays', type=Path, nargs='+')
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.replays) else 1)
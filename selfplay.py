@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import dictionary
+from dictionary import Dictionary
+from engine import GameState, TileState
+from solver import solve_board
+
+
+"""
+Plays headless games of Textagons with a bot, to see how changes to the rules (roll_for_fire_tile(),
+roll_for_crystal_tile(), LETTER_WEIGHTS, R_VALUES) play out over many games. Run it from the repo root, e.g.:
+
+    python selfplay.py --games 10000 --policy greedy --seed 1
+
+Each turn the bot looks at every word on the board (see solver.py) and its policy picks one to submit; if the board
+has no words at all, it scrambles. A game ends when a fire tile burns through the bottom row, or after {{ max_turns }}.
+
+Games are spread over a ProcessPoolExecutor in chunks, and each worker loads the dictionary once. Every game is seeded
+from the run's seed and its own index, so a run's results don't depend on how many workers played it.
+"""
+
+
+DICTIONARY_PATH = Path(__file__).parent / 'assets' / 'dictionary.txt'
+
+Move = Optional[tuple[str, list[TileState], int]]  # A solve_board() result, or None to scramble
+Policy = Callable[[GameState, list[tuple[str, list[TileState], int]]], Move]
+
+
+class GameResult(NamedTuple):
+    turns: int
+    score: int
+    words: int
+    scrambles: int
+    fire_death: bool
+    crystals_created: int
+    fires_created: int
+    bonus_words: int
+
+
+def play_bonus(game: GameState, solutions: list) -> Move:
+    """ Plays the bonus word whenever it's on the board; otherwise plays like play_greedy(). """
+    for solution in solutions:
+        if solution[0] == game.bonus_word:
+            return solution
+
+    return play_greedy(game, solutions)
+
+
+def play_greedy(game: GameState, solutions: list) -> Move:
+    """ Plays the highest scoring word. solve_board() lists solutions highest score first. """
+    return solutions[0] if solutions else None
+
+
+def play_longest(game: GameState, solutions: list) -> Move:
+    return max(solutions, key=lambda s: (len(s[0]), s[2]), default=None)
+
+
+def play_random(game: GameState, solutions: list) -> Move:
+    return game.rng.choice(solutions) if solutions else None
+
+
+def play_shortest(game: GameState, solutions: list) -> Move:
+    """ Plays the lowest scoring of the shortest words, which is roughly what a hurried player does. """
+    return min(solutions, key=lambda s: (len(s[0]), s[2]), default=None)
+
+
+POLICIES = {
+    'bonus': play_bonus,
+    'greedy': play_greedy,
+    'longest': play_longest,
+    'random': play_random,
+    'shortest': play_shortest,
+}
+
+_worker_dictionary = None  # Set in each worker process by init_worker()
+
+
+def init_worker(dictionary_path: Path):
+    """ Loads the dictionary (and builds its trie) once per worker process, rather than once per game. """
+    global _worker_dictionary
+
+    _worker_dictionary = dictionary.load(dictionary_path)
+    _worker_dictionary.trie
+
+
+def play_game(words: Dictionary, policy: Policy, seed: int | str, max_turns: int = 1000, num_columns: int = 7,
+              num_rows: int = 7) -> GameResult:
+    """ Plays one game with {{ policy }} choosing every move. Random policies draw from the game's own RNG too. """
+    game = GameState(words, num_columns, num_rows, seed)
+    crystals_created = fires_created = bonus_words = scrambles = turns = 0
+
+    while not game.game_over and turns < max_turns:
+        turns += 1
+        move = policy(game, solve_board(game.board, words, game.bonus_word))
+
+        if move is None:
+            game.scramble()
+            scrambles += 1
+        else:
+            submission = game.submit(move[1])
+            bonus_words += submission.is_bonus
+            crystals_created += sum(t.type == 2 for t in move[1])  # The submitted tiles now sit at the top of the
+            fires_created += sum(t.type == 0 for t in move[1])     # board, holding any special types they rolled
+
+        game.tick()
+
+    return GameResult(turns, game.score, len(game.history), scrambles, game.game_over, crystals_created,
+                      fires_created, bonus_words)
+
+
+def play_games(seed: int, indexes: range, policy_name: str, max_turns: int, num_columns: int,
+               num_rows: int) -> list[GameResult]:
+    """ Plays the games numbered {{ indexes }} in a worker process. See init_worker(). """
+    return play_games_with(_worker_dictionary, seed, indexes, policy_name, max_turns, num_columns, num_rows)
+
+
+def play_games_with(words: Dictionary, seed: int, indexes: range, policy_name: str, max_turns: int,
+                    num_columns: int, num_rows: int) -> list[GameResult]:
+    results = []
+    policy = POLICIES[policy_name]
+
+    for index in indexes:
+        results.append(play_game(words, policy, f'{seed}:{index}', max_turns, num_columns, num_rows))
+
+    return results
+
+
+def run(num_games: int, policy_name: str = 'greedy', seed: int = 0, workers: Optional[int] = None,
+        max_turns: int = 1000, num_columns: int = 7, num_rows: int = 7,
+        chunk_size: int = 0) -> list[GameResult]:
+    """
+    Plays {{ num_games }} games and returns their results in game order. {{ workers }} defaults to one per CPU; with a
+    single worker the games are played in this process. {{ chunk_size }} is the number of games each task plays, and
+    defaults to enough for a few tasks per worker, to keep the workers evenly loaded without much pickling.
+    """
+    workers = workers or os.cpu_count() or 1
+    args = (policy_name, max_turns, num_columns, num_rows)
+
+    if workers == 1:
+        words = dictionary.load(DICTIONARY_PATH)
+        return play_games_with(words, seed, range(num_games), *args)
+
+    chunk_size = chunk_size or max(1, min(100, num_games // (workers * 4)))
+    chunks = [range(start, min(start + chunk_size, num_games)) for start in range(0, num_games, chunk_size)]
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(DICTIONARY_PATH,)) as executor:
+        futures = [executor.submit(play_games, seed, chunk, *args) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+
+def describe(values: list[float]) -> dict[str, float]:
+    deciles = statistics.quantiles(values, n=10) if len(values) > 1 else values * 9
+
+    return {
+        'mean': statistics.fmean(values),
+        'stdev': statistics.pstdev(values),
+        'min': min(values),
+        'p10': deciles[0],
+        'p50': deciles[4],
+        'p90': deciles[8],
+        'max': max(values),
+    }
+
+
+def summarize(results: list[GameResult]) -> dict:
+    """ Distributions of each per-game number, plus the rates balance tuning cares about most. """
+    words = sum(r.words for r in results)
+
+    summary = {field: describe([getattr(r, field) for r in results])
+               for field in ('turns', 'score', 'words', 'scrambles', 'crystals_created', 'fires_created',
+                             'bonus_words')}
+    summary['rates'] = {
+        'games': len(results),
+        'fire_deaths': sum(r.fire_death for r in results) / len(results),
+        'crystals_per_word': sum(r.crystals_created for r in results) / max(words, 1),
+        'fires_per_word': sum(r.fires_created for r in results) / max(words, 1),
+        'bonus_hit_rate': sum(r.bonus_words for r in results) / max(words, 1),
+    }
+
+    return summary
+
+
+def print_summary(summary: dict):
+    rates = summary['rates']
+    print(f"{rates['games']} games, {rates['fire_deaths']:.1%} ended by fire")
+    print(f"  crystals per word {rates['crystals_per_word']:.3f}, fires per word {rates['fires_per_word']:.3f}, "
+          f"bonus words per word {rates['bonus_hit_rate']:.3f}")
+    print(f"  {'':<18}" + ''.join(f'{column:>10}' for column in ('mean', 'stdev', 'min', 'p10', 'p50', 'p90', 'max')))
+    for field, stats in summary.items():
+        if field != 'rates':
+            print(f'  {field:<18}' + ''.join(f'{value:>10.1f}' for value in stats.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play headless games of Textagons with a bot.')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to one per CPU')
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--size', type=int, nargs=2, default=(7, 7), metavar=('COLUMNS', 'ROWS'))
+    parser.add_argument('--json', type=Path, help='also write the summary to this file')
+    args = parser.parse_args()
+
+    results = run(args.games, args.policy, args.seed, args.workers, args.max_turns, *args.size)
+    summary = summarize(results)
+
+    print_summary(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import itertools
+import json
+from pathlib import Path
+from typing import Optional
+
+import dictionary
+from dictionary import Dictionary
+from engine import GameState
+
+
+"""
+Hosts many headless games at once for bots, tournaments and remote front ends. One asyncio event loop serves any
+number of connections over TCP or a Unix socket, and every session shares one Dictionary. Sessions are plain
+GameStates, the rules TileGroup draws (see engine.py), so an idle session costs a few KB and no CPU. Run it from the
+repo root, e.g.:
+
+    python server.py --port 7777
+    python server.py --unix /tmp/textagons.sock
+
+The protocol is one JSON object per line each way. Every request has an "op", and may have an "id", which its
+response repeats; responses come back in request order. A connection can run any number of sessions, and its
+sessions are closed when it disconnects. Lines longer than {{ MAX_REQUEST_SIZE }} bytes are skipped, with an error.
+
+    {"id": 1, "op": "new", "seed": 42}           ("columns", "rows" and "seed" are optional)
+    {"id": 2, "op": "submit", "session": 1, "path": [[2, 1], [2, 2], [3, 2]]}
+    {"id": 3, "op": "scramble", "session": 1}
+    {"id": 4, "op": "restart", "session": 1}
+    {"id": 5, "op": "state", "session": 1}
+    {"id": 6, "op": "close", "session": 1}
+
+Responses have "ok": true and the session's state, or "ok": false and an "error". A session's state is its "letters"
+by column, top to bottom, its tile "types" (one string of digits per column; 0 fire, 1 normal, 2 crystal), "score",
+"bonus_word", "words" played and "game_over". A submit also says whether the path was "accepted" as a word, and if
+so its "word" and "points". After every submit and scramble, fire tiles burn down as they do between the bot's moves
+in selfplay.py.
+"""
+
+
+DICTIONARY_PATH = Path(__file__).parent / 'assets' / 'dictionary.txt'
+MAX_BOARD_SIZE = 30
+MAX_REQUEST_SIZE = 2 ** 16  # Bytes in one request line; also the StreamReader's buffer limit
+
+
+class GameServer:
+    """
+    The sessions of every connection, by id. handle() runs one request against them; serve_connection() feeds it the
+    requests from one connection.
+    """
+
+    def __init__(self, words: Dictionary):
+        self.words = words
+        self.sessions = {}  # Session id -> GameState
+        self.session_ids = itertools.count(1)
+
+    def game_state(self, session: int) -> dict:
+        game = self.sessions[session]
+
+        return {
+            'session': session,
+            'letters': [[tile.letter for tile in column] for column in game.board.columns],
+            'types': [''.join(str(tile.type) for tile in column) for column in game.board.columns],
+            'score': game.score,
+            'bonus_word': game.bonus_word,
+            'words': len(game.history),
+            'game_over': game.game_over,
+        }
+
+    def handle(self, request: dict, owned: set[int]) -> dict:
+        """
+        Runs {{ request }} and returns its response. Sessions started by the request are added to {{ owned }}, and
+        only sessions in {{ owned }} can be played. Never raises: anything that goes wrong is the response's "error".
+        """
+        try:
+            op = request['op']
+            if op == 'new':
+                num_columns, num_rows = int(request.get('columns', 7)), int(request.get('rows', 7))
+                if not (3 <= num_columns <= MAX_BOARD_SIZE and 3 <= num_rows <= MAX_BOARD_SIZE):
+                    raise ValueError(f'boards are 3 to {MAX_BOARD_SIZE} tiles on a side')
+                game = GameState(self.words, num_columns, num_rows, request.get('seed'))
+                session = next(self.session_ids)
+                self.sessions[session] = game
+                owned.add(session)
+                return {'ok': True, **self.game_state(session)}
+
+            session = request['session']
+            if session not in owned:
+                raise ValueError(f'no session {session} on this connection')
+            game = self.sessions[session]
+            response = {'ok': True}
+
+            match op:
+                case 'close':
+                    del self.sessions[session]
+                    owned.discard(session)
+                    return {'ok': True, 'session': session}
+
+                case 'restart':
+                    game.reset()
+
+                case 'scramble':
+                    self.require_in_progress(game)
+                    game.scramble()
+                    game.tick()
+
+                case 'state':
+                    pass
+
+                case 'submit':
+                    self.require_in_progress(game)
+                    path = request['path']
+                    if not isinstance(path, list):
+                        raise ValueError('"path" is a list of [column, row] pairs')
+                    tiles = [game.board.tile_at(*self.slot(game, slot)) for slot in path]
+                    submission = game.submit(tiles)
+                    response['accepted'] = submission is not None
+                    if submission:
+                        response.update(word=submission.word, points=submission.score)
+                        game.tick()
+
+                case _:
+                    raise ValueError(f'unknown op {op!r}')
+
+            return {**response, **self.game_state(session)}
+
+        except KeyError as error:
+            return {'ok': False, 'error': f'missing {error}'}
+        except (TypeError, ValueError) as error:
+            return {'ok': False, 'error': str(error)}
+        except Exception as error:  # A bug in one game shouldn't close the connection, and every session on it
+            return {'ok': False, 'error': f'internal error: {type(error).__name__}: {error}'}
+
+    @staticmethod
+    def require_in_progress(game: GameState):
+        if game.game_over:
+            raise ValueError('the game is over; restart it to keep playing')
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        owned = set()  # The sessions this connection started
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial  # A last line with no newline
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as error:
+                    await self.skip_line(reader, error.consumed)
+                    line = None
+
+                try:
+                    if line is None:
+                        raise ValueError(f'requests are at most {MAX_REQUEST_SIZE} bytes long')
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('requests are JSON objects')
+                except ValueError as error:
+                    response = {'ok': False, 'error': f'bad request: {error}'}
+                else:
+                    response = self.handle(request, owned)
+                    if 'id' in request:
+                        response['id'] = request['id']
+
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                if writer.transport.get_write_buffer_size() > 2 ** 16:
+                    await writer.drain()  # Only wait on clients that aren't keeping up
+        except (ConnectionError, asyncio.IncompleteReadError):  # The latter if the client left partway through a line
+            pass
+        finally:
+            for session in owned:
+                del self.sessions[session]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def skip_line(reader: asyncio.StreamReader, consumed: int):
+        """
+        Throws away the rest of a line that was too long to read, {{ consumed }} bytes of which (as reported by
+        LimitOverrunError) are still in {{ reader }}'s buffer.
+        """
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+
+    @staticmethod
+    def slot(game: GameState, slot: list[int]) -> tuple[int, int]:
+        if not (isinstance(slot, list) and len(slot) == 2 and all(type(value) is int for value in slot)):
+            raise ValueError(f'path entries are [column, row] pairs, not {json.dumps(slot)}')
+        column, row = slot
+        if not (0 <= column < game.board.num_columns and 0 <= row < game.board.num_rows):
+            raise ValueError(f'no tile at {slot}')
+
+        return column, row
+
+
+class Client:
+    """
+    A connection to a GameServer. request() can be awaited by many tasks at once, which is how one connection plays
+    many sessions: requests are written as they come, and each response is matched to its request by "id".
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}  # Request id -> Future for its response
+        self.request_ids = itertools.count(1)
+        self.read_task = asyncio.create_task(self.read_responses())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.read_task.cancel()
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 7777, unix_path: Optional[Path] = None) -> 'Client':
+        if unix_path:
+            return cls(*await asyncio.open_unix_connection(unix_path))
+
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def read_responses(self):
+        """
+        Responses come back in request order, so one without an "id", like the server's reply to a line it couldn't
+        parse, answers the oldest pending request, and a line that isn't JSON fails it. Responses to requests that are
+        no longer pending are dropped.
+        """
+        try:
+            while line := await self.reader.readline():
+                try:
+                    response = json.loads(line)
+                    request_id = response.get('id') if isinstance(response, dict) else None
+                except ValueError as error:
+                    response, request_id = error, None
+
+                if request_id is None and self.pending:
+                    request_id = next(iter(self.pending))
+                if request_id not in self.pending:
+                    continue
+
+                future = self.pending.pop(request_id)
+                if future.done():  # Its request was cancelled
+                    continue
+                if isinstance(response, Exception):
+                    future.set_exception(ValueError(f'bad response from the server: {response}'))
+                else:
+                    future.set_result(response)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('the server closed the connection'))
+            self.pending.clear()
+
+    async def request(self, op: str, **fields) -> dict:
+        request_id = next(self.request_ids)
+        future = self.pending[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(json.dumps({'id': request_id, 'op': op, **fields}, separators=(',', ':')).encode() + b'\n')
+
+        return await future
+
+
+async def serve(words: Dictionary, host: str = '127.0.0.1', port: int = 7777, unix_path: Optional[Path] = None):
+    game_server = GameServer(words)
+    if unix_path:
+        server = await asyncio.start_unix_server(game_server.serve_connection, unix_path, limit=MAX_REQUEST_SIZE)
+    else:
+        server = await asyncio.start_server(game_server.serve_connection, host, port, limit=MAX_REQUEST_SIZE)
+
+    print(f"Serving on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Host headless Textagons sessions over line-delimited JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', type=Path, metavar='PATH', help='listen on a Unix socket instead of TCP')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(dictionary.load(DICTIONARY_PATH), args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
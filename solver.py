@@ -0,0 +1,69 @@
+from typing import NamedTuple
+
+from dictionary import END, Dictionary
+from engine import Board, TileState
+
+
+"""
+Finds every word that can be spelled on the board. Cells are plain indexes into parallel lists of letters, values and
+neighbor indexes, so the search itself doesn't touch any sprites. A depth-first walk from each cell follows the
+dictionary's trie alongside the path and abandons a branch as soon as its letters stop being the start of any word.
+"""
+
+
+class Solution(NamedTuple):
+    word: str
+    path: tuple[int, ...]
+    score: int
+
+
+def solve(letters: list[str], values: list[int], neighbors: list[list[int]], dictionary: Dictionary,
+          bonus_word: str = '') -> list[Solution]:
+    """
+    Returns every path through the board that spells a word of at least 3 letters. A word found along several paths
+    is listed once per path. Scores match engine.score_tiles(), including the 3x multiplier for {{ bonus_word }}.
+    """
+    root = dictionary.trie
+    cells = [letter.lower() for letter in letters]
+    bonus_word = bonus_word.lower()
+    visited = [False] * len(cells)
+    path = []
+    found = []
+
+    def visit(cell: int, node: dict, word: str, total: int):
+        for letter in cells[cell]:  # 'Qu' tiles step through two trie nodes
+            node = node.get(letter)
+            if node is None:
+                return
+
+        word += cells[cell]
+        total += values[cell]
+        visited[cell] = True
+        path.append(cell)
+
+        if END in node and len(word) > 2:
+            bonus_mult = 3 if word == bonus_word else 1
+            found.append(Solution(word.upper(), tuple(path), total * len(path) * bonus_mult))
+
+        for neighbor in neighbors[cell]:
+            if not visited[neighbor]:
+                visit(neighbor, node, word, total)
+
+        path.pop()
+        visited[cell] = False
+
+    for cell in range(len(cells)):
+        visit(cell, root, '', 0)
+
+    return found
+
+
+def solve_board(board: Board, dictionary: Dictionary, bonus_word: str = '') -> list[tuple[str, list[TileState], int]]:
+    """ Runs solve() over a game's board. Returns (word, tiles, score) for each path, highest score first. """
+    tiles = board.tiles()  # Column by column, so slot (column, row) is index column * num_rows + row
+    neighbors = [[c * board.num_rows + r for c, r in board.neighbor_table[t.column][t.row]] for t in tiles]
+
+    solutions = solve([t.letter for t in tiles], [t.value for t in tiles], neighbors, dictionary, bonus_word)
+    solutions.sort(key=lambda s: s.score, reverse=True)
+
+    return [(s.word, [tiles[i] for i in s.path], s.score) for s in solutions]
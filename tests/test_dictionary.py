@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+import dictionary
+
+
+WORDS = {'cat': 0.2, 'cats': 0.3, 'dog': 0.1, 'quiz': 0.9}
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / 'dictionary.txt'
+    path.write_text('\n'.join(f'{word},{r_value}' for word, r_value in WORDS.items()))
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path: Path, source: Path) -> Path:
+    path = tmp_path / 'dictionary.cache'
+    dictionary.load(source, path)
+    return path
+
+
+def test_cache_round_trip(source: Path, cache: Path):
+    words = dictionary.read_cache(cache, source.stat())
+
+    assert words is not None
+    assert words.words == set(WORDS)
+    assert words.words_with_prefix('cat') == ['cat', 'cats']
+    assert words.has_prefix('qu') and not words.has_prefix('dx')
+
+
+def test_cache_truncated_by_one_byte_is_rebuilt(source: Path, cache: Path):
+    cache.write_bytes(cache.read_bytes()[:-1])
+
+    assert dictionary.read_cache(cache, source.stat()) is None
+    assert dictionary.load(source, cache).words == set(WORDS)
+    assert dictionary.read_cache(cache, source.stat()) is not None
+
+
+def test_cache_with_a_flipped_byte_is_rebuilt(source: Path, cache: Path):
+    data = bytearray(cache.read_bytes())
+    data[-1] ^= 1  # Changes the last word without changing any lengths
+    cache.write_bytes(bytes(data))
+
+    assert dictionary.read_cache(cache, source.stat()) is None
+    assert dictionary.load(source, cache).words == set(WORDS)
@@ -1,51 +1,153 @@
 import math
-from random import choices
-from string import ascii_uppercase
+from collections import OrderedDict
+from functools import cache
 
 import pygame
 from pygame import gfxdraw
-from shapely.geometry import Polygon, Point
 
 from assets.colors import *
+from engine import LETTER_CHOICES, TileState
 
 
-LETTER_CHOICES = [c if c != 'Q' else 'Qu' for c in ascii_uppercase]
-LETTER_WEIGHTS = { 'A': 0.09, 'B': 0.02, 'C': 0.02, 'D': 0.04, 'E': 0.12, 'F': 0.02, 'G': 0.03, 'H':  0.02, 'I': 0.09,
-                   'J': 0.01, 'K': 0.01, 'L': 0.04, 'M': 0.03, 'N': 0.06, 'O': 0.08, 'P': 0.02, 'Qu': 0.01, 'R': 0.06,
-                   'S': 0.05, 'T': 0.06, 'U': 0.04, 'V': 0.02, 'W': 0.02, 'X': 0.01, 'Y': 0.02, 'Z': 0.01 }
+SQRT_3 = math.sqrt(3)
+SLOW_FLASH = 20  # Frames in one slow flash of a fire tile's letter
 
 
-class Tile(pygame.sprite.Sprite):
+def fire_flash_colors(steps: int) -> tuple[pygame.Color, ...]:
+    """
+    The letter color of a slowly flashing fire tile at each frame of its {{ steps }} frame flash: red warming toward
+    yellow, then back to red.
+    """
+    colors = []
+    for timer in range(steps):
+        color1 = red if timer < steps / 2 else yellow
+        color2 = yellow if color1 == red else red
+        colors.append(color1.lerp(color2, timer / steps))
+
+    return tuple(colors)
+
+
+FIRE_FLASH_COLORS = fire_flash_colors(SLOW_FLASH)
+TEXT_COLORS = (light_gray, teal, red, yellow, *FIRE_FLASH_COLORS)  # Every color a tile's letter can be drawn in
+
+
+@cache
+def hexagon_points(tile_size: int) -> tuple[tuple[tuple[float, float], ...], tuple[tuple[float, float], ...]]:
+    """ The (outer, inner) hexagons of a tile of {{ tile_size }}, shared by every tile of that size. """
+    center = tile_size / 2
+
+    return (tuple(Tile.calculate_hexagon_points(center_x=center, center_y=center, radius=tile_size / 2 - 4)),
+            tuple(Tile.calculate_hexagon_points(center_x=center, center_y=center, radius=tile_size / 2 - 8)))
+
+
+class GlyphAtlas:
+    """
+    Every letter a tile can show, rendered once in each of {{ TEXT_COLORS }} onto a single Surface (one row per
+    color), so drawing a tile's letter is one blit of its area and never a font render. 'Qu' uses the smaller bold
+    font, since it's two letters. There's one atlas per set of fonts; see for_fonts().
+    """
+
+    atlases = {}  # id(fonts) -> GlyphAtlas; each atlas keeps its fonts alive, so their id can't be reused
 
-    def __init__(self, tile_size: int, coords: tuple[float], column: int, fonts: list[pygame.font.Font]):
+    def __init__(self, fonts: list[pygame.font.Font]):
+        self.fonts = fonts
+        rows = [[(letter, (fonts['bold_sm'] if letter == 'Qu' else fonts['bold']).render(letter, True, color))
+                 for letter in LETTER_CHOICES] for color in TEXT_COLORS]
+        row_height = max(glyph.get_height() for row in rows for _, glyph in row)
+        width = max(sum(glyph.get_width() for _, glyph in row) for row in rows)
+
+        self.surface = pygame.Surface((width, row_height * len(rows)), pygame.SRCALPHA)
+        self.areas = {}  # (letter, color as a tuple) -> the glyph's Rect on {{ self.surface }}
+
+        for index, (color, row) in enumerate(zip(TEXT_COLORS, rows)):
+            x = 0
+            for letter, glyph in row:
+                # The atlas starts out fully transparent, so taking the max copies the glyph as it is
+                self.areas[(letter, tuple(color))] = self.surface.blit(glyph, (x, index * row_height),
+                                                                      special_flags=pygame.BLEND_RGBA_MAX)
+                x += glyph.get_width()
+
+    @classmethod
+    def for_fonts(cls, fonts: list[pygame.font.Font]) -> 'GlyphAtlas':
+        atlas = cls.atlases.get(id(fonts))
+        if atlas is None or atlas.fonts is not fonts:
+            atlas = cls.atlases[id(fonts)] = cls(fonts)
+
+        return atlas
+
+    def draw(self, surface: pygame.Surface, letter: str, color: pygame.Color, center: tuple[float, float]):
+        """ Blits {{ letter }} in {{ color }} onto {{ surface }}, centered on {{ center }}. """
+        area = self.areas[(letter, tuple(color))]
+        surface.blit(self.surface, (center[0] - area.w / 2, center[1] - area.h / 2), area)
+
+
+class Tile(pygame.sprite.Sprite):
+    """
+    Draws one TileState (see engine.py) and animates it falling into place. The letter, type, selection and so on all
+    live in {{ self.state }}, which the game rules change directly; the properties below just read from it.
+    Letters are drawn from a GlyphAtlas, so a fire tile's flashing letter steps through {{ FIRE_FLASH_COLORS }}.
+    The tile's animation advances in fixed simulation steps (step()), separately from drawing (update()): {{ self.rect }}
+    is where the simulation has the tile, and {{ self.draw_rect }} is where it's drawn, between the last two steps.
+    Finished tile images are shared between tiles through {{ render_cache }}, keyed on everything that affects how a
+    tile looks. A tile only goes back to the cache when that key differs from {{ self.render_key }}, the key its
+    current image was made for. The cache drops its least recently used images once it holds more than
+    {{ render_cache_size }}.
+    """
+
+    render_cache = OrderedDict()
+    render_cache_size = 256
+
+    def __init__(self, state: TileState, tile_size: int, coords: tuple[float], fonts: list[pygame.font.Font]):
         super().__init__()
 
+        self.state = state
         self.fonts = fonts
-        self.image = pygame.Surface((tile_size, tile_size))
-        self.rect = self.image.get_rect(topleft=coords)
-        self.column = column
+        self.atlas = GlyphAtlas.for_fonts(fonts)
+        self.image = None  # Set from {{ render_cache }} by update()
+        self.rect = pygame.Rect(coords, (tile_size, tile_size))
+        self.draw_rect = self.rect.copy()
+        self.previous_y = self.rect.y  # Where the tile was before the last step
         self.ay = 0
         self.border_color = light_gray
-        self.burn_ready = False
-        self.collision_poly = None
         self.fast_flash = 5
         self.fill_color = dark_gray
         self.flash_fire = False
         self.flash_timer = 0
         self.flash_timer_max = self.fast_flash
-        self.inner_points = []
-        self.outer_points = []
-        self.marked = False
-        self.selected = False
-        self.slow_flash = 20
+        self.outer_points, self.inner_points = hexagon_points(tile_size)
+        self.render_key = None
+        self.shown_type = None  # The tile type {{ self.text_color }} was last set for
+        self.slow_flash = SLOW_FLASH
         self.target_y = self.rect.y
         self.text_color = light_gray
-        self.type = 1  # 0: Fire, 1: Normal, 2: Crystal
-        self.value = 0
 
-        self.choose_letter()
-        self.deselect()
-        self.update()
+    @property
+    def column(self) -> int:
+        return self.state.column
+
+    @property
+    def letter(self) -> str:
+        return self.state.letter
+
+    @property
+    def marked(self) -> bool:
+        return self.state.marked
+
+    @property
+    def row(self) -> int:
+        return self.state.row
+
+    @property
+    def selected(self) -> bool:
+        return self.state.selected
+
+    @property
+    def type(self) -> int:
+        return self.state.type
+
+    @property
+    def value(self) -> int:
+        return self.state.value
 
     @staticmethod
     def calculate_hexagon_points(center_x: float, center_y: float, radius: float) -> list[float]:
@@ -60,19 +162,22 @@ class Tile(pygame.sprite.Sprite):
         return points
 
     def collide_point(self, point: tuple[float]) -> bool:
-        return self.collision_poly.contains(Point(point))
+        """
+        Tests {{ point }} against the outer hexagon. Folding the point into the hexagon's top-right quadrant leaves two
+        edges to check: the flat top, and the slanted edge running from the top corner to the rightmost vertex.
+        """
+        radius = self.rect.w / 2 - 4
+        dx = abs(point[0] - self.rect.centerx)
+        dy = abs(point[1] - self.rect.centery)
 
-    def choose_letter(self):
-        weights = [LETTER_WEIGHTS[l] for l in LETTER_CHOICES]
-        self.letter = choices(population=LETTER_CHOICES, weights=weights, k=1)[0]
-        self.value = self.lookup_letter_value(self.letter)
+        return dy < radius * SQRT_3 / 2 and SQRT_3 * dx + dy < SQRT_3 * radius
 
     def deselect(self):
-        self.selected = False
+        self.state.deselect()
 
-    def draw_poly_and_set_collision(self) -> pygame.Surface:
-        """ Creates an antialiased hexagon inside a bounding box of size {{ self.image.get_width() }}. """
-        tile_size = self.image.get_width()
+    def draw_poly(self) -> pygame.Surface:
+        """ Creates an antialiased hexagon inside a bounding box of size {{ self.rect.w }}. """
+        tile_size = self.rect.w
         hexagon = pygame.Surface((tile_size, tile_size))
         hexagon.fill(dark_gray)
 
@@ -87,21 +192,10 @@ class Tile(pygame.sprite.Sprite):
             else:
                 self.border_color = light_gray
 
-        if not self.outer_points:
-            self.outer_points = self.calculate_hexagon_points(
-                center_x=tile_size / 2, center_y=tile_size / 2,
-                radius=tile_size / 2 - 4)
         pygame.gfxdraw.aapolygon(hexagon, self.outer_points, self.border_color)
         pygame.gfxdraw.filled_polygon(hexagon, self.outer_points, self.border_color)
 
-        # Set collision poly from outer shape for mouse event handling
-        self.set_collision_poly(self.outer_points)
-
         # Draw inner hexagon
-        if not self.inner_points:
-            self.inner_points = self.calculate_hexagon_points(
-                center_x=tile_size / 2, center_y=tile_size / 2,
-                radius=tile_size / 2 - 8)
         pygame.gfxdraw.aapolygon(hexagon, self.inner_points, self.fill_color)
         pygame.gfxdraw.filled_polygon(hexagon, self.inner_points, self.fill_color)
 
@@ -109,23 +203,24 @@ class Tile(pygame.sprite.Sprite):
 
         return hexagon
 
-    def lookup_letter_value(self, letter: str) -> int:
-        """ Crystal tiles are worth 2x normal value. Fire tiles are always worth 0 points. """
-        match letter:
-            case 'A' | 'E' | 'I' | 'L' | 'N' | 'O' | 'R' | 'S' | 'T' | 'U':
-                return 1 * self.type
-            case 'D' | 'G':
-                return 2 * self.type
-            case 'B' | 'C' | 'M' | 'P':
-                return 3 * self.type
-            case 'F' | 'H' | 'V' | 'W' | 'Y':
-                return 4 * self.type
-            case 'K':
-                return 5 * self.type
-            case 'J' | 'X':
-                return 8 * self.type
-            case _:
-                return 10 * self.type
+    def get_image(self, key: tuple) -> pygame.Surface:
+        """ Returns the image for render {{ key }} from {{ render_cache }}, rendering and caching it first if needed. """
+        cache = self.render_cache
+
+        image = cache.get(key)
+        if image is None:
+            image = self.render()
+            cache[key] = image
+            if len(cache) > self.render_cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+
+        return image
+
+    def lift_off_screen(self):
+        """ Moves the tile up off the top of the screen, so it can fall back in once its state has been replaced. """
+        self.rect.move_ip((0, self.rect.y * -1 - self.rect.h))
 
     def move_toward_target(self):
         if self.rect.y < self.target_y:
@@ -135,35 +230,23 @@ class Tile(pygame.sprite.Sprite):
             self.ay = 0
             self.rect.y = self.target_y
 
-    def remove(self):
-        """ Resets tile state, chooses a new letter, and moves tile up off the top of the screen. """
-        self.rect.move_ip((0, self.rect.y * -1 - self.rect.h))
-        self.set_type(1)
-        self.burn_ready = False
-        self.scramble()
+    def render(self) -> pygame.Surface:
+        """ Draws the hexagon with the letter centered on it. """
+        hexagon = self.draw_poly()
 
-    def scramble(self):
-        self.deselect()
+        tile_size = hexagon.get_width()
+        self.atlas.draw(hexagon, self.letter, self.text_color, (tile_size / 2, tile_size / 2 + 2))
 
-        if self.type == 1:  # Special tiles can't be scrambled away
-            self.marked = False
-            self.choose_letter()
+        return hexagon
 
     def select(self):
-        self.selected = True
+        self.state.select()
 
-    def set_collision_poly(self, points: list[tuple[float]]):
-        updated_points = []
-        for point in points:
-            point_x = point[0] + self.rect.x
-            point_y = point[1] + self.rect.y
-            updated_points.append((point_x, point_y))
-        self.collision_poly = Polygon(updated_points)
+    def set_text_color(self):
+        """ Resets the letter color whenever the tile changes type. """
+        self.shown_type = self.type
 
-    def set_type(self, tile_type: int):
-        self.type = tile_type  # 0: Fire, 1: Normal, 2: Crystal
-
-        match tile_type:
+        match self.type:
             case 0:
                 self.text_color = red
             case 1:
@@ -171,8 +254,10 @@ class Tile(pygame.sprite.Sprite):
             case 2:
                 self.text_color = teal
 
-    def update(self):
-        self.image = self.draw_poly_and_set_collision()
+    def step(self):
+        """ Advances the tile by one simulation step: the fire flash and the fall toward {{ self.target_y }}. """
+        if self.type != self.shown_type:
+            self.set_text_color()
 
         if self.type == 0:  # Fire tile
             self.flash_timer += 1
@@ -185,23 +270,23 @@ class Tile(pygame.sprite.Sprite):
                 if self.flash_timer == self.flash_timer_max:
                     self.flash_timer = 0
                 else:
-                    color1 = red if self.flash_timer < self.flash_timer_max / 2 else yellow
-                    color2 = yellow if color1 == red else red
-                    self.text_color = color1.lerp(color2, self.flash_timer / self.flash_timer_max)
-
-        # Smaller font for "Qu" tiles
-        if self.letter == 'Qu':
-            rendered = self.fonts['bold_sm'].render(self.letter, True, self.text_color)
-        else:
-            rendered = self.fonts['bold'].render(self.letter, True, self.text_color)
-
-        tile_size = self.image.get_width()
-        center_x = tile_size / 2 - rendered.get_width() / 2
-        center_y = tile_size / 2 - rendered.get_height() / 2 + 2
-        self.image.blit(rendered, (center_x, center_y))
+                    self.text_color = FIRE_FLASH_COLORS[self.flash_timer]
 
+        self.previous_y = self.rect.y
         self.move_toward_target()
 
     def toggle_mark(self):
-        if not self.selected:
-            self.marked = not self.marked
+        self.state.toggle_mark()
+
+    def update(self, alpha: float = 1):
+        """
+        Brings the tile's image up to date, and places {{ self.draw_rect }} {{ alpha }} of the way from where the tile
+        was before the last step to where it is now.
+        """
+        key = (self.rect.w, self.letter, self.type, self.selected, self.marked, tuple(self.text_color), self.atlas)
+        if key != self.render_key:
+            self.image = self.get_image(key)
+            self.render_key = key
+
+        self.draw_rect.x = self.rect.x
+        self.draw_rect.y = round(self.previous_y + (self.rect.y - self.previous_y) * alpha)
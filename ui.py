@@ -1,6 +1,6 @@
 import pygame
 
-from typing import Optional
+from typing import Callable, Optional
 
 from assets.colors import *
 
@@ -46,11 +46,15 @@ class Textfield(pygame.sprite.Sprite):
     """
     Class for static and dynamic text boxes. May be responsive to click events or not. All of the "buttons" on the
     main screen are actually instances of this class.
+    A Textfield aligned to the right or bottom is placed relative to that edge of {{ screen_size }}. Its image is only
+    rendered again when its text, color or font changes ({{ self.render_key }}), so on other frames the same Surface
+    is kept and the renderer can skip it.
     """
 
     def __init__(self, label: str, font: pygame.font.Font, initial_text: str, align: str, offset: tuple[float],
                  text_color: pygame.Color=light_gray, static: bool=False, draw_border: bool=False,
-                 border_color: pygame.Color=light_gray, small_font: pygame.font.Font=None):
+                 border_color: pygame.Color=light_gray, small_font: pygame.font.Font=None,
+                 screen_size: tuple[int, int]=(0, 0)):
         super().__init__()
 
         self.label = label
@@ -67,7 +71,8 @@ class Textfield(pygame.sprite.Sprite):
         self.flash_timer = 0
         self.flash_timer_max = 120
         self.flash_color = teal
-        self.screen_offset = None
+        self.screen_size = screen_size
+        self.render_key = None
 
         self.set_text(initial_text)
 
@@ -113,13 +118,16 @@ class Textfield(pygame.sprite.Sprite):
         self.text_color = light_gray
 
     def set_alignment_and_rect(self, align: str, offset: tuple[float]):
-        from main import SCREEN_WIDTH, SCREEN_HEIGHT
-
-        screen_offset_x = SCREEN_WIDTH - self.image.get_width() if 'right' in align else 0
-        screen_offset_y = SCREEN_HEIGHT - self.image.get_height() if 'bottom' in align else 0
+        screen_offset_x = self.screen_size[0] - self.image.get_width() if 'right' in align else 0
+        screen_offset_y = self.screen_size[1] - self.image.get_height() if 'bottom' in align else 0
 
         self.rect = self.image.get_rect(topleft=(screen_offset_x + offset[0], screen_offset_y + offset[1]))
 
+    def set_color(self, text_color: pygame.Color):
+        """ Changes the color the text goes back to between (and after) flashes. """
+        self.default_text_color = text_color
+        self.update()
+
     def set_text(self, text: str | int, max_size: int = 99, resize: bool = False):
         """
         Converts {{ text }} to a str, truncates it if it's longer than {{ max_size }}, and displays it.
@@ -144,6 +152,11 @@ class Textfield(pygame.sprite.Sprite):
     def update(self):
         self.animate_flash()
 
+        key = (self.text, tuple(self.text_color), id(self.current_font))
+        if key == self.render_key:
+            return
+        self.render_key = key
+
         if self.draw_border:
             text_surf = self.current_font.render(self.text, True, self.text_color)
             self.image = pygame.Surface((text_surf.get_width() + 8, text_surf.get_height() + 8))
@@ -162,8 +175,9 @@ class Textfield(pygame.sprite.Sprite):
 class Menu(pygame.sprite.Sprite):
     """
     Class for "modal" style popup menus, which can contain multicolored text and buttons.
-    Each sprite contained within a Menu is stored in its {{ elements }} list; this list is iterated over every frame
-    for drawing.
+    Each sprite contained within a Menu is stored in its {{ elements }} list, and drawn onto the Menu's image by
+    update() whenever an element has been added since the last draw ({{ self.changed }}). The rest of the time the
+    same image is kept, so the renderer can skip it.
     """
 
     def __init__(self, label: str, dimensions: tuple[int],
@@ -178,10 +192,13 @@ class Menu(pygame.sprite.Sprite):
         self.rect = self.image.get_rect(topleft=offset)
 
         self.elements = []
+        self.changed = True
+        self.content = None  # What the menu was built to show; see UIGroup.show_menu()
 
     def add_button(self, label: str, text: str, coords: tuple[int], font: pygame.font.Font,
                    color: pygame.Color=light_gray):
         self.elements.append(Button(label, text, coords, self.offset, font, color))
+        self.changed = True
 
     def add_multicolor_text(self, text_obj: dict, font: pygame.font.Font, coords: tuple[int]):
         """
@@ -198,19 +215,26 @@ class Menu(pygame.sprite.Sprite):
         value_text = f' ({text_obj["value"]} pts)'
         self.elements.append(Textfield(label='', font=font, initial_text=value_text, align='topleft',
                                        offset=(coords[0] + x_offset, coords[1])))
+        self.changed = True
 
     def add_text(self, text: str, coords: tuple[int], font: pygame.font.Font, color: pygame.Color=light_gray):
         self.elements.append(Textfield(label='', font=font, initial_text=text, align='topleft', offset=coords))
+        self.changed = True
 
     def add_centered_text(self, text: str, font: pygame.font.Font, y_position: int=20, color: pygame.Color=light_gray):
         temp = font.render(text, True, color)
         offset = (self.rect.w / 2 - temp.get_width() / 2, y_position)
         self.elements.append(Textfield(label='', font=font, initial_text=text, align='topleft', offset=offset))
+        self.changed = True
 
     def buttons(self) -> list[Button]:
         return [e for e in self.elements if isinstance(e, Button)]
 
     def update(self):
+        if not self.changed:
+            return
+
+        self.image = pygame.Surface(self.dimensions)
         self.image.fill(dark_gray)
         border = pygame.Rect(0, 0, self.rect.w, self.rect.h)
         pygame.draw.rect(self.image, light_gray, border, width=1)
@@ -219,88 +243,67 @@ class Menu(pygame.sprite.Sprite):
             element.update()
             self.image.blit(element.image, (element.rect.x, element.rect.y))
 
+        self.changed = False
+
 
 class UIGroup(pygame.sprite.Group):
-    """ Class to store and manipulate the Textfield objects shown on the main game screen. """
+    """
+    Class to store and manipulate the Textfield objects shown on the main game screen. Every sprite in the group is
+    indexed by its label in {{ self.by_label }}, and menus are kept in {{ self.menus }} while they're hidden.
+    """
+
+    def __init__(self, fonts: list[pygame.font.Font], screen_size: tuple[int, int]):
+        self.by_label = {}  # Label -> the sprite in this group with that label
+        self.menus = {}  # Label -> Menu, whether shown or not; see show_menu()
 
-    def __init__(self, fonts: list[pygame.font.Font]):
         super().__init__()
 
         # Score display
         self.add(Textfield(label='score_label', font=fonts['small'], initial_text='Score', align='topright',
-                           offset=(-10, 5), static=True))
-        self.add(Textfield(label='score', font=fonts['bold_sm'], initial_text=0, align='topright', offset=(-10, 29)))
+                           offset=(-10, 5), static=True, screen_size=screen_size))
+        self.add(Textfield(label='score', font=fonts['bold_sm'], initial_text=0, align='topright', offset=(-10, 29),
+                           screen_size=screen_size))
         self.add(Textfield(label='score_delta', font=fonts['bold_sm'], initial_text='', align='topright',
-                           offset=(-75, 1), text_color=green))
+                           offset=(-75, 1), text_color=green, screen_size=screen_size))
 
         # Bonus word display
         self.add(Textfield(label='bonus_label', font=fonts['small'], initial_text='Bonus word', align='topright',
-                           offset=(-10, 71), static=True))
+                           offset=(-10, 71), static=True, screen_size=screen_size))
         self.add(Textfield(label='bonus_word', font=fonts['bold_sm'], initial_text='', align='topright',
-                           offset=(-10, 95), small_font=fonts['small']))
+                           offset=(-10, 95), small_font=fonts['small'], screen_size=screen_size))
 
         # Currently selected word
         self.add(Textfield(label='current_word_label', font=fonts['small'], initial_text='Current word',
-                           align='topright', offset=(-10, 137), static=True))
+                           align='topright', offset=(-10, 137), static=True, screen_size=screen_size))
         self.add(Textfield(label='current_word', font=fonts['bold_sm'], initial_text='', align='topright',
-                           offset=(-10, 161)))
+                           offset=(-10, 161), screen_size=screen_size))
 
         # History
         self.add(Textfield(label='btn_history', font=fonts['small'], initial_text='HISTORY', align='bottomright',
-                           offset=(-10, -124), static=True, draw_border=True))
+                           offset=(-10, -124), static=True, draw_border=True, screen_size=screen_size))
 
         # Unmark button
         self.add(Textfield(label='btn_unmark', font=fonts['small'], initial_text='UNMARK', align='bottomright',
-                           offset=(-10, -86), static=True, draw_border=True))
+                           offset=(-10, -86), static=True, draw_border=True, screen_size=screen_size))
 
         # Scramble button
         self.add(Textfield(label='btn_scramble', font=fonts['small'], initial_text='SCRAMBLE', align='bottomright',
-                           offset=(-10, -48), static=True, draw_border=True))
+                           offset=(-10, -48), static=True, draw_border=True, screen_size=screen_size))
 
         # Restart button
         self.add(Textfield(label='btn_restart', font=fonts['small'], initial_text='RESTART', align='bottomright',
-                           offset=(-10, -10), text_color=red, static=True, draw_border=True, border_color=red))
-
-    def bonus_word(self) -> Textfield:
-        return [e for e in self.sprites() if e.label == 'bonus_word'][0]
-
-    def current_word(self) -> Textfield:
-        return [e for e in self.sprites() if e.label == 'current_word'][0]
+                           offset=(-10, -10), text_color=red, static=True, draw_border=True, border_color=red,
+                           screen_size=screen_size))
 
-    def flash(self, textfield_label: str, flash_color: pygame.Color):
-        textfield = [s for s in self.sprites() if s.label == textfield_label][0]
-        textfield.flash(flash_color)
-
-    def game_over_menu(self) -> Optional[Menu]:
-        try:
-            return [s for s in self.sprites() if s.label == 'game_over_menu'][0]
-        except IndexError:
-            return None
-
-    def hide_menus(self):
-        self.remove(self.history())
-        self.remove(self.restart_menu())
-        self.remove(self.game_over_menu())
-
-    def history(self) -> Optional[Menu]:
-        try:
-            return [s for s in self.sprites() if s.label == 'history'][0]
-        except IndexError:
-            return None
+    def add_internal(self, sprite: Textfield | Menu, layer=None):
+        super().add_internal(sprite, layer)
+        self.by_label[sprite.label] = sprite
 
-    def restart_menu(self) -> Optional[Menu]:
-        try:
-            return [s for s in self.sprites() if s.label == 'restart_menu'][0]
-        except IndexError:
-            return None
-
-    def score(self) -> Textfield:
-        return [e for e in self.sprites() if e.label == 'score'][0]
+    def bonus_word(self) -> Textfield:
+        return self.by_label['bonus_word']
 
-    def show_game_over_menu(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]):
-        menu_dimensions = (261, 220)
-        self.add(Menu(label='game_over_menu', dimensions=menu_dimensions, offset=(55, 132)))
-        menu = self.game_over_menu()
+    def build_game_over_menu(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]) -> Menu:
+        menu = Menu(label='game_over_menu', dimensions=(261, 220), offset=(55, 132))
         menu.add_centered_text(text='Game over', font=fonts['bold_sm'])
 
         menu.add_text(text='Longest word', font=fonts['mini'], coords=(10, 70))
@@ -318,10 +321,10 @@ class UIGroup(pygame.sprite.Group):
 
         menu.add_button(label='restart_yes', text='RESTART', coords=(88, 204), font=fonts['small'])
 
-    def show_history(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]):
-        dimensions = (300, 180)
-        self.add(Menu(label='history', dimensions=dimensions, offset=(40, 119)))
-        history = self.history()
+        return menu
+
+    def build_history(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]) -> Menu:
+        history = Menu(label='history', dimensions=(300, 180), offset=(40, 119))
 
         history.add_centered_text(text='Word history', font=fonts['bold_sm'], y_position=10)
         history.add_text(text='Longest word', font=fonts['mini'], coords=(10, 50))
@@ -339,18 +342,68 @@ class UIGroup(pygame.sprite.Group):
 
         history.add_button(label='close_history', text='CLOSE', coords=(220, 174), font=fonts['small'])
 
-    def show_restart_menu(self, fonts: list[pygame.font.Font]):
-        menu_dimensions = (261, 150)
-
-        self.add(Menu(label='restart_menu', dimensions=menu_dimensions, offset=(55, 132)))
+        return history
 
-        restart_menu = self.restart_menu()
+    def build_restart_menu(self, fonts: list[pygame.font.Font]) -> Menu:
+        restart_menu = Menu(label='restart_menu', dimensions=(261, 150), offset=(55, 132))
         restart_menu.add_centered_text(text='Restart game?', font=fonts['bold_sm'])
         restart_menu.add_button(label='restart_yes', text='YES', coords=(70, 112), font=fonts['small'], color=red)
         restart_menu.add_button(label='restart_no', text='NO', coords=(155, 112), font=fonts['small'])
 
+        return restart_menu
+
+    def current_word(self) -> Textfield:
+        return self.by_label['current_word']
+
+    def flash(self, textfield_label: str, flash_color: pygame.Color):
+        self.by_label[textfield_label].flash(flash_color)
+
+    def game_over_menu(self) -> Optional[Menu]:
+        return self.by_label.get('game_over_menu')
+
+    def hide_menus(self):
+        self.remove(*self.menus.values())
+
+    def history(self) -> Optional[Menu]:
+        return self.by_label.get('history')
+
+    def remove_internal(self, sprite: Textfield | Menu):
+        super().remove_internal(sprite)
+        del self.by_label[sprite.label]
+
+    def restart_menu(self) -> Optional[Menu]:
+        return self.by_label.get('restart_menu')
+
+    def score(self) -> Textfield:
+        return self.by_label['score']
+
+    def show_game_over_menu(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]):
+        self.show_menu('game_over_menu', (longest_word, highest_scoring),
+                       lambda: self.build_game_over_menu(longest_word, highest_scoring, fonts))
+
+    def show_history(self, longest_word: str, highest_scoring: dict, fonts: list[pygame.font.Font]):
+        self.show_menu('history', (longest_word, highest_scoring),
+                       lambda: self.build_history(longest_word, highest_scoring, fonts))
+
+    def show_menu(self, label: str, content: tuple, build: Callable[[], Menu]):
+        """
+        Shows the menu called {{ label }}. Menus are built once and then reused for as long as what they show,
+        {{ content }}, stays the same; when it changes, {{ build }} makes a new one.
+        """
+        menu = self.menus.get(label)
+        if menu is None or menu.content != content:
+            if menu is not None:
+                self.remove(menu)
+            menu = self.menus[label] = build()
+            menu.content = content
+
+        self.add(menu)
+
+    def show_restart_menu(self, fonts: list[pygame.font.Font]):
+        self.show_menu('restart_menu', (), lambda: self.build_restart_menu(fonts))
+
     def show_score_delta(self, delta: str):
         """ Show timed "+X" text next to score display. """
-        textfield = [s for s in self.sprites() if s.label == 'score_delta'][0]
+        textfield = self.by_label['score_delta']
         textfield.set_text(f'+{delta}')
         textfield.flash_and_clear(green)